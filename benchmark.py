@@ -0,0 +1,185 @@
+"""
+Benchmark de referência do Sistema de Recomendação
+Gera dados sintéticos em escalas configuráveis e mede inicialização, cada estratégia
+de matching, gerar_recomendacoes e a vazão em lote, gravando os resultados em JSON
+para comparação entre commits. Usa um modelo de embeddings sintético (offline).
+
+Exemplo:
+    python benchmark.py --escalas 1000,100000 --saida benchmark.json
+
+As variáveis de ambiente do sistema (EMBEDDINGS_CACHE_DIR, SIMILARES_PATH, ...)
+continuam valendo e são registradas no resultado.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from dados_sinteticos import ModeloSintetico, gerar_dados_sinteticos
+from registro import nivel_temporario
+from sistema_recomendacao import SistemaRecomendacaoCursos
+
+ESTRATEGIAS = [
+    '_match_unidade_mesma',
+    '_match_unidade_outra',
+    '_match_trilha_profissional',
+    '_match_similaridade_semantica',
+    '_match_ead'
+]
+
+VARIAVEIS_CONFIGURACAO = [
+    'EMBEDDINGS_CACHE_DIR', 'SIMILARES_PATH', 'INDICE_SIMILARIDADE', 'INDICE_DIR',
+    'SNAPSHOT_DIR', 'OTIMIZAR_MEMORIA'
+]
+
+
+def estatisticas(tempos):
+    """Resumo de uma lista de durações (segundos) em milissegundos"""
+    tempos = np.asarray(tempos) * 1000
+    if len(tempos) == 0:
+        return {'n': 0}
+    return {
+        'n': int(len(tempos)),
+        'media_ms': float(tempos.mean()),
+        'p50_ms': float(np.percentile(tempos, 50)),
+        'p95_ms': float(np.percentile(tempos, 95)),
+        'p99_ms': float(np.percentile(tempos, 99)),
+        'max_ms': float(tempos.max())
+    }
+
+
+def cronometrar(funcao, *args):
+    t1 = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - t1, resultado
+
+
+def medir_escala(paths, n_amostra, n_lote, semente):
+    """Executa todas as medições para um conjunto de dados"""
+    metricas = {}
+
+    # Inicialização
+    metricas['inicializacao_s'], sistema = cronometrar(
+        lambda: SistemaRecomendacaoCursos(**paths, modelo=ModeloSintetico())
+    )
+    metricas['preparacao_semantica_s'], _ = cronometrar(sistema.preparar_busca_semantica)
+
+    rng = np.random.default_rng(semente)
+    n_interesses = len(sistema.df_interesses)
+    posicoes = rng.choice(n_interesses, min(n_amostra, n_interesses), replace=False)
+    cods = sistema.df_interesses['COD_INTERESSE'].iloc[posicoes].tolist()
+
+    # Estratégias individuais (recebem o registro já extraído do interesse)
+    registros = [sistema._registro_interesse(posicao) for posicao in posicoes.tolist()]
+    metricas['estrategias'] = {}
+    for nome in ESTRATEGIAS:
+        estrategia = getattr(sistema, nome)
+        tempos, linhas = [], 0
+        for registro in registros:
+            duracao, resultado = cronometrar(estrategia, registro)
+            tempos.append(duracao)
+            linhas += len(resultado)
+        metricas['estrategias'][nome] = {**estatisticas(tempos), 'linhas': linhas}
+
+    # Fluxo completo por interesse
+    tempos, erros = [], 0
+    for cod in cods:
+        t1 = time.perf_counter()
+        try:
+            sistema.gerar_recomendacoes(cod)
+        except Exception:
+            erros += 1
+        tempos.append(time.perf_counter() - t1)
+    metricas['gerar_recomendacoes'] = {**estatisticas(tempos), 'erros': erros}
+
+    # Vazão em lote
+    cods_lote = sistema.df_interesses['COD_INTERESSE'].head(n_lote).tolist()
+    duracao, resultado = cronometrar(sistema.gerar_recomendacoes_lote, cods_lote)
+    metricas['lote'] = {
+        'interesses': len(cods_lote),
+        'recomendacoes': int(len(resultado)),
+        'tempo_s': duracao,
+        'interesses_por_s': len(cods_lote) / duracao if duracao else None
+    }
+
+    # Pico de memória do processo (Linux: KB; macOS: bytes)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metricas['rss_max_mb'] = rss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+    return metricas
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do Sistema de Recomendação')
+    parser.add_argument('--escalas', default='1000,100000',
+                        help='Quantidades de ofertas separadas por vírgula (ex.: 1000,100000,1000000)')
+    parser.add_argument('--interesses', type=int, help='Interesses por escala (padrão: metade das ofertas)')
+    parser.add_argument('--amostra', type=int, default=200, help='Interesses medidos individualmente')
+    parser.add_argument('--lote', type=int, default=5000, help='Interesses no teste de vazão em lote')
+    parser.add_argument('--diretorio', default='benchmark_dados', help='Diretório dos dados sintéticos')
+    parser.add_argument('--regerar', action='store_true', help='Regera os dados mesmo se já existirem')
+    parser.add_argument('--semente', type=int, default=0, help='Semente dos dados e da amostra')
+    parser.add_argument('--saida', default='benchmark.json', help='Arquivo JSON de resultados')
+    args = parser.parse_args()
+
+    resultado = {
+        'commit': commit_atual(),
+        'data': pd.Timestamp.now().isoformat(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'configuracao': {nome: os.getenv(nome) for nome in VARIAVEIS_CONFIGURACAO},
+        'escalas': []
+    }
+
+    for n_ofertas in [int(x) for x in args.escalas.split(',')]:
+        diretorio = os.path.join(args.diretorio, f'ofertas_{n_ofertas}')
+        paths = {
+            'path_interesses': os.path.join(diretorio, 'interesses.parquet'),
+            'path_ofertas': os.path.join(diretorio, 'ofertas.csv'),
+            'path_estrutura': os.path.join(diretorio, 'estrutura.xlsx')
+        }
+
+        if args.regerar or not all(os.path.exists(p) for p in paths.values()):
+            print(f"🧪 Gerando dados sintéticos: {n_ofertas} ofertas")
+            t1 = time.perf_counter()
+            paths = gerar_dados_sinteticos(diretorio, n_ofertas, n_interesses=args.interesses, semente=args.semente)
+            print(f"   ⌛ {time.perf_counter() - t1:.1f} segundos")
+
+        print(f"⏱️  Medindo escala de {n_ofertas} ofertas...")
+        # As mensagens de andamento do sistema são suprimidas durante as medições (avisos continuam)
+        with nivel_temporario('aviso'):
+            metricas = medir_escala(paths, args.amostra, args.lote, args.semente)
+        resultado['escalas'].append({'ofertas': n_ofertas, **metricas})
+
+        print(f"   Inicialização:         {metricas['inicializacao_s']:10.2f} s")
+        print(f"   gerar_recomendacoes:   {metricas['gerar_recomendacoes']['p50_ms']:10.1f} ms (p50)"
+              f"  {metricas['gerar_recomendacoes']['p99_ms']:10.1f} ms (p99)")
+        print(f"   Lote:                  {metricas['lote']['interesses_por_s']:10.1f} interesses/s")
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✅ Resultados gravados em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Cache persistente de embeddings
+Evita recalcular os vetores do catálogo a cada inicialização do sistema
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+
+class CacheEmbeddings:
+    """
+    Armazena embeddings em disco, indexados pelo hash do texto normalizado.
+
+    Os vetores ficam em um arquivo .npy (aberto com memory-map) e a ordem das
+    linhas em um arquivo JSON auxiliar. Cada modelo possui seus próprios
+    arquivos, de modo que a chave efetiva é (modelo, hash do texto).
+    """
+
+    def __init__(self, diretorio, nome_modelo):
+        """
+        Args:
+            diretorio: Diretório onde os arquivos do cache são gravados
+            nome_modelo: Nome do modelo SentenceTransformer que gera os vetores
+        """
+        self.diretorio = diretorio
+        self.nome_modelo = nome_modelo
+
+        slug_modelo = re.sub(r'[^A-Za-z0-9_.-]+', '_', nome_modelo)
+        self.path_vetores = os.path.join(diretorio, f'embeddings_{slug_modelo}.npy')
+        self.path_indice = os.path.join(diretorio, f'embeddings_{slug_modelo}_indice.json')
+
+        self.vetores, self.hashes = self._carregar()
+        self.indice = {h: i for i, h in enumerate(self.hashes)}
+
+    @staticmethod
+    def normalizar_texto(texto):
+        """Normaliza unicode e espaços para que textos equivalentes compartilhem a chave"""
+        texto = unicodedata.normalize('NFC', str(texto))
+        return re.sub(r'\s+', ' ', texto).strip()
+
+    @staticmethod
+    def hash_texto(texto_normalizado):
+        """Hash estável do texto normalizado"""
+        return hashlib.sha1(texto_normalizado.encode('utf-8')).hexdigest()
+
+    def _carregar(self):
+        """Carrega vetores e índice do disco, descartando arquivos inconsistentes"""
+        if not (os.path.exists(self.path_vetores) and os.path.exists(self.path_indice)):
+            return None, []
+
+        try:
+            with open(self.path_indice, encoding='utf-8') as f:
+                metadados = json.load(f)
+            vetores = np.load(self.path_vetores, mmap_mode='r')
+        except (OSError, ValueError):
+            return None, []
+
+        hashes = metadados.get('hashes', [])
+        if metadados.get('modelo') != self.nome_modelo or len(hashes) != len(vetores):
+            return None, []
+
+        return vetores, hashes
+
+    def _salvar(self, vetores, hashes):
+        """Grava vetores e índice de forma atômica e reabre o memory-map"""
+        os.makedirs(self.diretorio, exist_ok=True)
+
+        tmp_vetores = self.path_vetores + '.tmp.npy'
+        tmp_indice = self.path_indice + '.tmp'
+
+        np.save(tmp_vetores, vetores)
+        with open(tmp_indice, 'w', encoding='utf-8') as f:
+            json.dump({
+                'modelo': self.nome_modelo,
+                'dimensao': int(vetores.shape[1]),
+                'hashes': hashes
+            }, f)
+
+        os.replace(tmp_vetores, self.path_vetores)
+        os.replace(tmp_indice, self.path_indice)
+
+        self.vetores = np.load(self.path_vetores, mmap_mode='r')
+        self.hashes = hashes
+        self.indice = {h: i for i, h in enumerate(hashes)}
+
+    def obter(self, textos, model):
+        """
+        Retorna os embeddings dos textos, calculando apenas os ausentes do cache.
+
+        Args:
+            textos: Lista de textos a converter em vetores
+            model: Modelo com método encode (SentenceTransformer)
+
+        Returns:
+            np.ndarray (len(textos), dimensao) na mesma ordem de `textos`
+        """
+        normalizados = [self.normalizar_texto(t) for t in textos]
+        hashes = [self.hash_texto(t) for t in normalizados]
+
+        # Textos novos ou alterados (deduplicados, preservando a ordem)
+        faltantes = {}
+        for h, texto in zip(hashes, normalizados):
+            if h not in self.indice and h not in faltantes:
+                faltantes[h] = texto
+
+        if faltantes:
+            novos = np.asarray(model.encode(list(faltantes.values())), dtype=np.float32)
+
+            if self.vetores is not None and len(self.vetores) > 0:
+                vetores = np.vstack([np.asarray(self.vetores, dtype=np.float32), novos])
+            else:
+                vetores = novos
+
+            self._salvar(vetores, self.hashes + list(faltantes.keys()))
+
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+
+        posicoes = np.fromiter((self.indice[h] for h in hashes), dtype=np.int64, count=len(hashes))
+        return np.asarray(self.vetores[posicoes])
@@ -0,0 +1,66 @@
+"""
+Cache de resultados de recomendação
+LRU limitado em quantidade de entradas, com expiração opcional (TTL)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheResultados:
+    """
+    Cache LRU com expiração por tempo.
+
+    Guarda qualquer valor (inclusive None); use `obter(chave, padrao)` com um
+    sentinela para distinguir ausência de um resultado vazio armazenado.
+    Seguro para uso entre threads.
+    """
+
+    def __init__(self, tamanho_max, ttl=None, relogio=time.monotonic):
+        """
+        Args:
+            tamanho_max: Quantidade máxima de entradas (0 desabilita o cache)
+            ttl: Validade de cada entrada em segundos (None = sem expiração)
+            relogio: Função que retorna o instante atual em segundos
+        """
+        self.tamanho_max = tamanho_max
+        self.ttl = ttl
+        self.relogio = relogio
+        self.acertos = 0
+        self.falhas = 0
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obter(self, chave, padrao=None):
+        with self._trava:
+            entrada = self._entradas.get(chave)
+
+            if entrada is not None and self.ttl is not None and self.relogio() - entrada[0] > self.ttl:
+                del self._entradas[chave]
+                entrada = None
+
+            if entrada is None:
+                self.falhas += 1
+                return padrao
+
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[1]
+
+    def guardar(self, chave, valor):
+        if self.tamanho_max <= 0:
+            return
+
+        with self._trava:
+            self._entradas[chave] = (self.relogio(), valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_max:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
@@ -0,0 +1,143 @@
+"""
+Gerador de dados sintéticos e modelo de embeddings offline
+Produz planilha de estrutura, CSV de ofertas e base de interesses no mesmo layout
+das bases reais, em escala configurável (usado pelo benchmark).
+"""
+
+import hashlib
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+AREAS = ['TECNOLOGIA', 'SAUDE', 'GESTAO', 'INDUSTRIA', 'ALIMENTOS', 'CONSTRUCAO', 'EDUCACAO', 'TURISMO']
+
+PALAVRAS = [
+    'Programacao', 'Web', 'Dados', 'Enfermagem', 'Logistica', 'Soldagem', 'Panificacao',
+    'Eletrica', 'Redes', 'Vendas', 'Basico', 'Avancado', 'Gestao', 'Seguranca', 'Design',
+    'Mecanica', 'Cozinha', 'Financas', 'Marketing', 'Automacao', 'Predial', 'Hotelaria'
+]
+
+DIAS = ['SEG', 'TER', 'QUA', 'QUI', 'SEX', 'SAB']
+
+# Combinações de 1 a 3 dias, no formato do CSV de ofertas ("SEG - QUA")
+COMBINACOES_DIAS = [' - '.join(c) for n in (1, 2, 3) for c in itertools.combinations(DIAS, n)]
+
+
+class ModeloSintetico:
+    """
+    Substituto offline do SentenceTransformer.
+
+    Cada palavra recebe um vetor pseudoaleatório estável (derivado do hash) e o
+    embedding do texto é a média normalizada das palavras, de modo que títulos com
+    palavras em comum são similares. Não baixa pesos nem depende de torch.
+    """
+
+    def __init__(self, dimensao=768):
+        self.dimensao = dimensao
+        self._vetores_palavras = {}
+
+    def _vetor_palavra(self, palavra):
+        vetor = self._vetores_palavras.get(palavra)
+        if vetor is None:
+            semente = int(hashlib.md5(palavra.encode('utf-8')).hexdigest()[:8], 16)
+            vetor = np.random.default_rng(semente).standard_normal(self.dimensao).astype(np.float32)
+            self._vetores_palavras[palavra] = vetor
+        return vetor
+
+    def encode(self, textos, **kwargs):
+        saida = np.zeros((len(textos), self.dimensao), dtype=np.float32)
+        for i, texto in enumerate(textos):
+            palavras = str(texto).lower().replace('-', ' ').split()
+            for palavra in palavras:
+                saida[i] += self._vetor_palavra(palavra)
+        normas = np.linalg.norm(saida, axis=1, keepdims=True)
+        return np.divide(saida, normas, out=saida, where=normas > 0)
+
+
+def _titulos(rng, n):
+    palavras = rng.choice(PALAVRAS, (n, 3))
+    return [' '.join(linha) for linha in palavras]
+
+
+def gerar_dados_sinteticos(diretorio, n_ofertas, n_interesses=None, n_cursos=None, n_unidades=None, semente=0):
+    """
+    Gera as três bases de entrada do sistema.
+
+    Args:
+        diretorio: Onde gravar os arquivos
+        n_ofertas: Quantidade de ofertas
+        n_interesses: Quantidade de interesses (padrão: metade das ofertas, mínimo 1000)
+        n_cursos: Tamanho do catálogo (padrão: proporcional às ofertas)
+        n_unidades: Quantidade de unidades (padrão: proporcional às ofertas)
+        semente: Semente do gerador
+
+    Returns:
+        Dicionário com path_interesses, path_ofertas e path_estrutura
+    """
+    rng = np.random.default_rng(semente)
+    n_interesses = n_interesses or max(1000, n_ofertas // 2)
+    n_cursos = n_cursos or min(20000, max(200, n_ofertas // 20))
+    n_unidades = n_unidades or min(2000, max(20, n_ofertas // 500))
+    n_trilhas = max(20, n_cursos // 10)
+
+    os.makedirs(diretorio, exist_ok=True)
+    paths = {
+        'path_interesses': os.path.join(diretorio, 'interesses.parquet'),
+        'path_ofertas': os.path.join(diretorio, 'ofertas.csv'),
+        'path_estrutura': os.path.join(diretorio, 'estrutura.xlsx')
+    }
+
+    # Estrutura: catálogo, unidades e trilhas
+    cursos = pd.DataFrame({
+        'COD_CURSO': np.arange(1, n_cursos + 1),
+        'TITULO': _titulos(rng, n_cursos),
+        'AREA_CONHECIMENTO': rng.choice(AREAS, n_cursos),
+        'MODALIDADE': rng.choice(['PRESENCIAL', 'EAD', 'SEMIPRESENCIAL EAD'], n_cursos, p=[.6, .3, .1]),
+        'STATUS': rng.choice(['ATIVO', 'DESCONTINUADO', 'EM_REFORMULACAO', 'INDISPONIVEL'], n_cursos, p=[.85, .05, .05, .05])
+    })
+
+    unidades = pd.DataFrame({
+        'COD_UNIDADE': np.arange(100, 100 + n_unidades),
+        'NOME_UNIDADE': [f'Unidade {i}' for i in range(n_unidades)],
+        'LATITUDE': rng.uniform(-25, -19, n_unidades),
+        'LONGITUDE': rng.uniform(-53, -44, n_unidades)
+    })
+
+    trilhas = {'AREA_PROFISSIONAL': [f'TRILHA {i}' for i in range(n_trilhas)]}
+    for j in range(6):
+        cods = rng.integers(1, n_cursos + 1, n_trilhas).astype(str)
+        trilhas[f'CURSO_{j + 1}'] = np.where(rng.random(n_trilhas) < .8, cods, '-')
+
+    with pd.ExcelWriter(paths['path_estrutura']) as escritor:
+        unidades.to_excel(escritor, sheet_name='UNIDADES', index=False)
+        cursos.to_excel(escritor, sheet_name='CATALOGO_CURSOS', index=False)
+        pd.DataFrame(trilhas).to_excel(escritor, sheet_name='TRILHAS', index=False)
+
+    # Ofertas (CSV no layout de origem)
+    datas = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 330, n_ofertas), 'D')
+    ofertas = pd.DataFrame({
+        'COD_OFERTA': np.arange(1, n_ofertas + 1),
+        'COD_CURSO': rng.integers(1, n_cursos + 1, n_ofertas),
+        'COD_UNIDADE': rng.integers(100, 100 + n_unidades, n_ofertas),
+        'DATA_CRIACAO': datas.strftime('%d/%m/%Y'),
+        'DATA_INICIO': (datas + pd.Timedelta(days=30)).strftime('%d/%m/%Y'),
+        'DIAS_SEMANA': np.array(COMBINACOES_DIAS)[rng.integers(0, len(COMBINACOES_DIAS), n_ofertas)],
+        'TURNO': rng.choice(['DIURNO', 'VESPERTINO', 'NOTURNO', 'INTEGRAL'], n_ofertas)
+    })
+    ofertas.to_csv(paths['path_ofertas'], sep=';', index=False, encoding='latin1')
+
+    # Interesses
+    interesses = pd.DataFrame({
+        'COD_INTERESSE': np.arange(1, n_interesses + 1),
+        'COD_ALUNO': rng.integers(1, max(2, n_interesses // 3), n_interesses),
+        'COD_CURSO': rng.integers(1, n_cursos + 1, n_interesses),
+        'COD_UNIDADE': rng.integers(100, 100 + n_unidades, n_interesses),
+        'DATA_INTERESSE': pd.Timestamp('2024-12-01') + pd.to_timedelta(rng.integers(0, 240, n_interesses), 'D')
+    })
+    for coluna in ['TURNO_MANHA', 'TURNO_TARDE', 'TURNO_NOITE'] + [f'DIA_{d}' for d in DIAS]:
+        interesses[coluna] = rng.choice(['S', 'N'], n_interesses)
+    interesses.to_parquet(paths['path_interesses'], index=False)
+
+    return paths
@@ -0,0 +1,296 @@
+"""
+Escrita incremental dos resultados em batch
+Grava cada bloco de recomendações assim que é gerado (CSV, Parquet ou JSONL) e
+registra um checkpoint que permite retomar o processamento após uma falha.
+"""
+
+import glob
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+FORMATOS = ('csv', 'parquet', 'jsonl')
+
+# Tipos das colunas de saída no Parquet. Declarados (e não inferidos de um bloco), pois
+# uma coluna de texto sem nenhum valor em um bloco (ex.: AREA_PROFISSIONAL sem
+# recomendações de trilha) chega como float NaN.
+TIPOS_COLUNAS = {
+    'COD_OFERTA': pa.int64(),
+    'COD_CURSO': pa.int64(),
+    'COD_UNIDADE': pa.int64(),
+    'COD_INTERESSE': pa.int64(),
+    'COD_INTERESSE_ORIGEM': pa.int64(),
+    'COD_ALUNO': pa.int64(),
+    'DATA_CRIACAO': pa.timestamp('us'),
+    'DATA_INICIO': pa.timestamp('us'),
+    'MASCARA_AGENDA': pa.uint16(),
+    'TITULO_OFERTA': pa.string(),
+    'AREA_OFERTA': pa.string(),
+    'MODALIDADE_OFERTA': pa.string(),
+    'AREA_TITULO': pa.string(),
+    'TIPO_INDICACAO': pa.string(),
+    'NIVEL_MATCH': pa.string(),
+    'NOME_UNIDADE': pa.string(),
+    'LATITUDE': pa.float64(),
+    'LONGITUDE': pa.float64(),
+    'DISTANCIA_KM': pa.float64(),
+    'AREA_PROFISSIONAL': pa.string(),
+    'SCORE_SIMILARIDADE': pa.float64(),
+    'CURSO_INTERESSE': pa.string(),
+    'UNIDADE_INTERESSE': pa.string(),
+    'AREA_INTERESSE': pa.string(),
+    'MODALIDADE_INTERESSE': pa.string(),
+    'PRIORIDADE': pa.int64(),
+    'QTD_INTERESSES': pa.int64()
+}
+
+
+class EscritorResultados:
+    """
+    Base dos escritores em streaming.
+
+    O checkpoint (`<path>.checkpoint`) é um JSONL com uma linha por bloco gravado,
+    contendo os interesses do bloco e a posição do arquivo de saída após a gravação.
+    Ao retomar, a saída é truncada na última posição registrada (descartando um
+    bloco gravado pela metade) e os interesses já registrados são ignorados.
+    """
+
+    formato = None
+
+    def __init__(self, path, retomar=False):
+        """
+        Args:
+            path: Arquivo (CSV/JSONL) ou diretório (Parquet) de saída
+            retomar: Se True, continua a partir do checkpoint; se False, sobrescreve a saída
+        """
+        self.path = path
+        self.path_checkpoint = f'{path}.checkpoint'
+        self.interesses_concluidos = set()
+        self.blocos = []
+
+        if retomar:
+            self.blocos = self._ler_checkpoint()
+            for bloco in self.blocos:
+                self.interesses_concluidos.update(bloco['interesses'])
+            self._restaurar(self.blocos[-1] if self.blocos else None)
+        else:
+            self._limpar()
+            if os.path.exists(self.path_checkpoint):
+                os.remove(self.path_checkpoint)
+
+        self._arquivo_checkpoint = open(self.path_checkpoint, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _ler_checkpoint(self):
+        """Blocos registrados, ignorando uma última linha incompleta"""
+        if not os.path.exists(self.path_checkpoint):
+            return []
+
+        blocos = []
+        with open(self.path_checkpoint, encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    blocos.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    break
+
+        # Reescreve apenas as linhas válidas
+        with open(self.path_checkpoint, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(bloco) + '\n' for bloco in blocos)
+
+        return blocos
+
+    def escrever(self, df, cod_interesses):
+        """
+        Grava um bloco de recomendações e registra seus interesses no checkpoint.
+
+        Args:
+            df: Recomendações do bloco (pode ser vazio)
+            cod_interesses: Interesses processados no bloco, com ou sem recomendação
+        """
+        registro = {'interesses': list(cod_interesses), **self._gravar(df)}
+
+        self._arquivo_checkpoint.write(json.dumps(registro) + '\n')
+        self._arquivo_checkpoint.flush()
+        os.fsync(self._arquivo_checkpoint.fileno())
+
+        self.blocos.append(registro)
+        self.interesses_concluidos.update(registro['interesses'])
+
+    def fechar(self):
+        self._arquivo_checkpoint.close()
+
+    def _limpar(self):
+        raise NotImplementedError
+
+    def _restaurar(self, ultimo_bloco):
+        raise NotImplementedError
+
+    def _gravar(self, df):
+        """Grava o bloco e retorna os dados de posição para o checkpoint"""
+        raise NotImplementedError
+
+
+class _EscritorTexto(EscritorResultados):
+    """Escritores de arquivo único, gravado por anexação"""
+
+    def _limpar(self):
+        pasta = os.path.dirname(self.path)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        open(self.path, 'wb').close()
+
+    def _restaurar(self, ultimo_bloco):
+        posicao = ultimo_bloco['posicao'] if ultimo_bloco else 0
+        if not os.path.exists(self.path):
+            if posicao:
+                raise ValueError(f'Checkpoint {self.path_checkpoint} sem o arquivo de saída {self.path}')
+            open(self.path, 'wb').close()
+        os.truncate(self.path, posicao)
+
+    def _gravar(self, df):
+        with open(self.path, 'ab') as f:
+            if not df.empty:
+                f.write(self._serializar(df, inicio=f.tell() == 0))
+                f.flush()
+                os.fsync(f.fileno())
+            return {'posicao': f.tell()}
+
+    def _serializar(self, df, inicio):
+        raise NotImplementedError
+
+
+class EscritorCSV(_EscritorTexto):
+    """CSV em UTF-8 com BOM (como o processamento em batch original); cabeçalho no primeiro bloco"""
+
+    formato = 'csv'
+
+    def _serializar(self, df, inicio):
+        texto = df.to_csv(index=False, header=inicio, lineterminator='\n')
+        return ('\ufeff' + texto if inicio else texto).encode('utf-8')
+
+
+class EscritorJSONL(_EscritorTexto):
+    """Um objeto JSON por recomendação"""
+
+    formato = 'jsonl'
+
+    def _serializar(self, df, inicio):
+        texto = df.to_json(orient='records', lines=True, date_format='iso', force_ascii=False)
+        return (texto if texto.endswith('\n') else texto + '\n').encode('utf-8')
+
+
+class EscritorParquet(EscritorResultados):
+    """
+    Diretório de arquivos Parquet, um por bloco, todos com o mesmo esquema.
+
+    Os tipos vêm de TIPOS_COLUNAS (colunas fora dele: pelo dtype, texto como string);
+    do primeiro bloco vem apenas a ordem das colunas. Cada bloco é convertido para
+    esse esquema, de modo que o diretório pode ser lido como um único dataset
+    (pd.read_parquet(path)).
+    """
+
+    formato = 'parquet'
+
+    def __init__(self, path, retomar=False):
+        self.esquema = None
+        super().__init__(path, retomar)
+
+    def _partes(self):
+        return sorted(glob.glob(os.path.join(self.path, 'parte-*.parquet')))
+
+    def _limpar(self):
+        os.makedirs(self.path, exist_ok=True)
+        for parte in self._partes():
+            os.remove(parte)
+
+    def _restaurar(self, ultimo_bloco):
+        os.makedirs(self.path, exist_ok=True)
+
+        # Partes não registradas no checkpoint são de um bloco interrompido
+        registradas = {bloco['parte'] for bloco in self.blocos if bloco.get('parte')}
+        for parte in self._partes():
+            if os.path.basename(parte) not in registradas:
+                os.remove(parte)
+
+        partes = self._partes()
+        if partes:
+            self.esquema = pq.read_schema(partes[0])
+
+    @staticmethod
+    def _esquema(df):
+        campos = []
+        for coluna, dtype in df.dtypes.items():
+            if coluna in TIPOS_COLUNAS:
+                campos.append(pa.field(coluna, TIPOS_COLUNAS[coluna]))
+            elif dtype == object or str(dtype) in ('str', 'string', 'category'):
+                campos.append(pa.field(coluna, pa.string()))
+            else:
+                campos.append(pa.Schema.from_pandas(df[[coluna]], preserve_index=False).field(coluna))
+        return pa.schema(campos)
+
+    def _tabela(self, df):
+        """Converte o bloco para o esquema fixo (colunas ausentes no bloco ficam nulas)"""
+        extras = [coluna for coluna in df.columns if coluna not in self.esquema.names]
+        if extras:
+            raise ValueError(f"Colunas fora do esquema do Parquet de saída: {', '.join(extras)}")
+
+        colunas = []
+        for campo in self.esquema:
+            if campo.name not in df.columns:
+                colunas.append(pa.nulls(len(df), type=campo.type))
+                continue
+
+            valores = df[campo.name]
+            if pa.types.is_string(campo.type):
+                valores = [None if pd.isna(v) else str(v) for v in valores.astype(object)]
+            colunas.append(pa.array(valores, type=campo.type, from_pandas=True))
+
+        return pa.Table.from_arrays(colunas, schema=self.esquema)
+
+    def _gravar(self, df):
+        if df.empty:
+            return {'parte': None}
+
+        if self.esquema is None:
+            self.esquema = self._esquema(df)
+
+        nome = f'parte-{len(self.blocos):06d}.parquet'
+        tmp = os.path.join(self.path, f'{nome}.tmp')
+        pq.write_table(self._tabela(df), tmp)
+        os.replace(tmp, os.path.join(self.path, nome))
+
+        return {'parte': nome}
+
+
+ESCRITORES = {
+    EscritorCSV.formato: EscritorCSV,
+    EscritorParquet.formato: EscritorParquet,
+    EscritorJSONL.formato: EscritorJSONL
+}
+
+
+def criar_escritor(path, formato=None, retomar=False):
+    """
+    Instancia o escritor do formato informado (ou inferido pela extensão do path).
+
+    Args:
+        path: Arquivo ou diretório de saída
+        formato: 'csv', 'parquet' ou 'jsonl'
+        retomar: Continua a partir do checkpoint existente
+    """
+    if formato is None:
+        formato = os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de saída desconhecido: {formato} (opções: {', '.join(FORMATOS)})")
+
+    return ESCRITORES[formato](path, retomar=retomar)
@@ -0,0 +1,224 @@
+"""
+Índices vetoriais para busca de cursos similares
+Backend exato (força bruta) e aproximado (IVF), selecionáveis por configuração
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from tabela_similares import hash_textos, normalizar_vetores, selecionar_top_k
+
+
+class IndiceVetorial:
+    """
+    Interface comum dos índices de similaridade cosseno.
+
+    Os vetores são normalizados na construção; `buscar` retorna posições
+    (linhas da matriz usada em `construir`) e scores em ordem decrescente.
+    """
+
+    tipo = None
+
+    def __init__(self, **parametros):
+        self.parametros = parametros
+        self.vetores = None
+        self.assinatura = ''
+
+    def __len__(self):
+        return 0 if self.vetores is None else len(self.vetores)
+
+    def construir(self, vetores, assinatura=''):
+        """
+        Indexa a matriz de vetores.
+
+        Args:
+            vetores: Matriz (n, dimensao)
+            assinatura: Identificador do conteúdo indexado (para validar o arquivo salvo)
+        """
+        self.vetores = normalizar_vetores(vetores)
+        self.assinatura = assinatura
+        self._construir()
+        return self
+
+    def _construir(self):
+        pass
+
+    def buscar(self, consultas, k):
+        """
+        Busca os k vizinhos mais similares de cada consulta.
+
+        Returns:
+            Tupla (posicoes, scores) com shape (consultas, min(k, n)); posições sem
+            vizinho ficam com -1 e score -inf
+        """
+        raise NotImplementedError
+
+    def _arrays(self):
+        return {}
+
+    def salvar(self, path):
+        """Grava o índice em um arquivo .npz"""
+        arrays = {
+            'tipo': np.array(self.tipo),
+            'assinatura': np.array(self.assinatura),
+            'vetores': self.vetores,
+            **{f'param__{nome}': np.array(valor) for nome, valor in self.parametros.items()},
+            **self._arrays()
+        }
+
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    def _restaurar(self, dados):
+        pass
+
+
+class IndiceExato(IndiceVetorial):
+    """Busca exata: produto interno contra todos os vetores"""
+
+    tipo = 'exato'
+
+    def buscar(self, consultas, k):
+        consultas = normalizar_vetores(np.atleast_2d(consultas))
+        return selecionar_top_k(consultas @ self.vetores.T, k)
+
+
+class IndiceIVF(IndiceVetorial):
+    """
+    Busca aproximada por listas invertidas (IVF).
+
+    Os vetores são agrupados por k-means esférico em `n_listas` centróides; cada
+    consulta compara apenas os vetores das `n_sondas` listas mais próximas.
+
+    Parâmetros:
+        n_listas: Quantidade de listas (padrão: raiz quadrada do número de vetores)
+        n_sondas: Listas visitadas por consulta
+        iteracoes: Iterações do k-means
+        semente: Semente da inicialização dos centróides
+    """
+
+    tipo = 'ivf'
+
+    def __init__(self, n_listas=None, n_sondas=8, iteracoes=20, semente=0):
+        super().__init__(
+            n_listas=0 if n_listas is None else n_listas,
+            n_sondas=n_sondas,
+            iteracoes=iteracoes,
+            semente=semente
+        )
+        self.centroides = None
+        self.ordem = None
+        self.inicio_listas = None
+
+    def _construir(self):
+        n = len(self.vetores)
+        n_listas = int(self.parametros['n_listas']) or max(1, int(np.sqrt(n)))
+        n_listas = min(n_listas, max(n, 1))
+
+        rng = np.random.default_rng(int(self.parametros['semente']))
+        if n == 0:
+            self.centroides = np.zeros((0, self.vetores.shape[1]), dtype=np.float32)
+            atribuicao = np.empty(0, dtype=np.int64)
+        else:
+            self.centroides = self.vetores[rng.choice(n, n_listas, replace=False)].copy()
+            for _ in range(int(self.parametros['iteracoes'])):
+                atribuicao = np.argmax(self.vetores @ self.centroides.T, axis=1)
+                somas = np.zeros_like(self.centroides)
+                np.add.at(somas, atribuicao, self.vetores)
+                vazias = np.bincount(atribuicao, minlength=n_listas) == 0
+                somas[vazias] = self.centroides[vazias]
+                self.centroides = normalizar_vetores(somas)
+            atribuicao = np.argmax(self.vetores @ self.centroides.T, axis=1)
+
+        # Listas invertidas em formato CSR: posições ordenadas por lista + offsets
+        self.ordem = np.argsort(atribuicao, kind='stable')
+        self.inicio_listas = np.concatenate([
+            [0], np.cumsum(np.bincount(atribuicao, minlength=len(self.centroides)))
+        ])
+
+    def buscar(self, consultas, k):
+        consultas = normalizar_vetores(np.atleast_2d(consultas))
+        k_saida = min(k, len(self))
+
+        posicoes = np.full((len(consultas), k_saida), -1, dtype=np.int64)
+        scores = np.full((len(consultas), k_saida), -np.inf, dtype=np.float32)
+        if k_saida == 0:
+            return posicoes, scores
+
+        n_sondas = min(int(self.parametros['n_sondas']), len(self.centroides))
+        listas, _ = selecionar_top_k(consultas @ self.centroides.T, n_sondas)
+
+        for i, consulta in enumerate(consultas):
+            candidatos = np.concatenate([
+                self.ordem[self.inicio_listas[lista]:self.inicio_listas[lista + 1]]
+                for lista in listas[i]
+            ])
+            pos, sc = selecionar_top_k((self.vetores[candidatos] @ consulta)[None, :], k_saida)
+            posicoes[i, :pos.shape[1]] = candidatos[pos[0]]
+            scores[i, :sc.shape[1]] = sc[0]
+
+        return posicoes, scores
+
+    def _arrays(self):
+        return {'centroides': self.centroides, 'ordem': self.ordem, 'inicio_listas': self.inicio_listas}
+
+    def _restaurar(self, dados):
+        self.centroides = dados['centroides']
+        self.ordem = dados['ordem']
+        self.inicio_listas = dados['inicio_listas']
+
+
+TIPOS_INDICE = {
+    IndiceExato.tipo: IndiceExato,
+    IndiceIVF.tipo: IndiceIVF
+}
+
+
+def criar_indice(tipo='exato', **parametros):
+    """Instancia um índice vazio do tipo informado ('exato' ou 'ivf')"""
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconhecido: {tipo} (opções: {', '.join(TIPOS_INDICE)})")
+    return TIPOS_INDICE[tipo](**parametros)
+
+
+def carregar_indice(path):
+    """Carrega um índice gravado com `IndiceVetorial.salvar`"""
+    with np.load(path, allow_pickle=False) as dados:
+        parametros = {
+            chave.split('__', 1)[1]: dados[chave].item()
+            for chave in dados.files if chave.startswith('param__')
+        }
+        indice = criar_indice(str(dados['tipo']), **parametros)
+        indice.vetores = dados['vetores']
+        indice.assinatura = str(dados['assinatura'])
+        indice._restaurar(dados)
+    return indice
+
+
+def assinatura_catalogo(codigos, textos, nome_modelo):
+    """Identifica o conteúdo indexado (modelo, códigos e textos) para validar índices salvos"""
+    h = hashlib.sha1(nome_modelo.encode('utf-8'))
+    for cod, hash_texto in zip(np.asarray(codigos).tolist(), hash_textos(textos).tolist()):
+        h.update(f'{cod}:{hash_texto};'.encode('utf-8'))
+    return h.hexdigest()
+
+
+def avaliar_recall(indice, referencia, consultas, k):
+    """
+    Recall@k médio de um índice em relação a uma referência (normalmente o exato).
+
+    Returns:
+        Fração dos k vizinhos da referência encontrados pelo índice avaliado
+    """
+    esperado, _ = referencia.buscar(consultas, k)
+    obtido, _ = indice.buscar(consultas, k)
+
+    acertos = [
+        len(set(e[e >= 0].tolist()) & set(o[o >= 0].tolist())) / max((e >= 0).sum(), 1)
+        for e, o in zip(esperado, obtido)
+    ]
+    return float(np.mean(acertos)) if acertos else 1.0
@@ -0,0 +1,78 @@
+"""
+Processamento em lote com múltiplos processos
+Divide os interesses entre workers criados por fork, que herdam (copy-on-write)
+as bases, os embeddings e os índices já carregados no processo principal.
+"""
+
+import gc
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from registro import logger
+
+# Sistema herdado pelos workers no fork (definido apenas durante o processamento)
+_sistema_compartilhado = None
+
+
+def _processar_fragmento(cod_interesses):
+    return _sistema_compartilhado.gerar_recomendacoes_lote(cod_interesses)
+
+
+def dividir_fragmentos(cod_interesses, quantidade):
+    """Divide a lista em até `quantidade` fragmentos contíguos, preservando a ordem"""
+    limites = np.linspace(0, len(cod_interesses), min(quantidade, len(cod_interesses)) + 1).astype(int)
+    return [cod_interesses[inicio:fim] for inicio, fim in zip(limites[:-1], limites[1:])]
+
+
+def gerar_recomendacoes_paralelo(sistema, cod_interesses, workers):
+    """
+    Equivalente a `sistema.gerar_recomendacoes_lote`, distribuído entre processos.
+
+    Os fragmentos são contíguos e recombinados na ordem original, de modo que o
+    resultado é idêntico ao do processamento em um único processo.
+
+    Args:
+        sistema: SistemaRecomendacaoCursos já inicializado
+        cod_interesses: Lista de códigos de interesse
+        workers: Quantidade de processos
+
+    Returns:
+        DataFrame no mesmo formato de gerar_recomendacoes_lote
+    """
+    global _sistema_compartilhado
+
+    # Desconhecidos são avisados aqui, uma vez, e não chegam aos workers
+    cods = list(dict.fromkeys(sistema.filtrar_interesses_conhecidos(cod_interesses)))
+
+    if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        logger.warning("⚠️  Plataforma sem suporte a fork; processando em um único processo")
+        workers = 1
+
+    if workers <= 1 or len(cods) < 2:
+        return sistema.gerar_recomendacoes_lote(cods)
+
+    # Tudo o que seria carregado sob demanda é preparado antes do fork, uma única vez
+    cod_cursos = sistema.df_interesses.loc[sistema.df_interesses['COD_INTERESSE'].isin(cods), 'COD_CURSO'].unique()
+    sistema.preparar_busca_semantica(cod_cursos)
+
+    # Um fragmento por worker: buscas por curso distinto se repetem em cada fragmento
+    fragmentos = dividir_fragmentos(cods, workers)
+
+    # Objetos já existentes saem da coleta de lixo para não serem tocados (e copiados) nos workers
+    _sistema_compartilhado = sistema
+    gc.collect()
+    gc.freeze()
+    try:
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            resultados = pool.map(_processar_fragmento, fragmentos, chunksize=1)
+    finally:
+        gc.unfreeze()
+        _sistema_compartilhado = None
+
+    resultados = [r for r in resultados if not r.empty]
+    if not resultados:
+        return pd.DataFrame()
+
+    return pd.concat(resultados, ignore_index=True)
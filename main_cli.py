@@ -4,12 +4,19 @@ Permite uso em batch e integração com outros sistemas.
 """
 
 from sistema_recomendacao import SistemaRecomendacaoCursos
+from lote_paralelo import gerar_recomendacoes_paralelo
+from escrita_resultados import FORMATOS, criar_escritor
+from registro import NIVEIS, BarraProgresso, configurar_registro, logger
 from dotenv import load_dotenv
 import os
 import pandas as pd
 import argparse
+import logging
 import sys
 
+# Interesses processados e gravados por bloco no modo batch
+TAMANHO_BLOCO_BATCH = 1000
+
 def main():
     """Função principal da CLI"""
     parser = argparse.ArgumentParser(
@@ -19,45 +26,67 @@ def main():
 Exemplos:
   %(prog)s --interesse 12345
   %(prog)s --interesse 12345 --output recomendacoes.csv
+  %(prog)s --interesse 12345 --limite 5
+  %(prog)s --aluno 678 --output recomendacoes_aluno.csv
+  %(prog)s --oferta 4321 --output interessados.csv
   %(prog)s --batch interesses.csv --output-dir resultados/
+  %(prog)s --batch interesses.csv --workers 16
+  %(prog)s --batch interesses.csv --output resultados.parquet --retomar
+  %(prog)s --batch interesses.csv --output resultados.parquet --silencioso
   %(prog)s --stats
+  %(prog)s --construir-similares --k 10
         '''
     )
     
     # Argumentos
     parser.add_argument('--interesse', type=int, help='Código do interesse a processar')
-    parser.add_argument('--output', help='Arquivo para salvar resultados (CSV)')
+    parser.add_argument('--output', help='Arquivo para salvar resultados (CSV; no modo batch, o formato segue a extensão)')
+    parser.add_argument('--aluno', type=int, help='Código do aluno (recomendações de todos os seus interesses, sem ofertas repetidas)')
+    parser.add_argument('--oferta', type=int, help='Código da oferta (interesses que a receberiam como recomendação)')
+    parser.add_argument('--limite', type=int, help='Máximo de recomendações (modos interesse único e aluno)')
     parser.add_argument('--batch', help='Arquivo CSV com lista de interesses')
     parser.add_argument('--output-dir', help='Diretório para salvar resultados em batch')
+    parser.add_argument('--workers', type=int, default=1, help='Processos usados no modo batch')
+    parser.add_argument('--formato', choices=FORMATOS, help='Formato da saída em batch (padrão: extensão do --output ou csv)')
+    parser.add_argument('--retomar', action='store_true', help='Retoma um batch interrompido a partir do checkpoint do --output')
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO_BATCH,
+                        help='Interesses processados e gravados por bloco no modo batch')
     parser.add_argument('--stats', action='store_true', help='Mostrar estatísticas do sistema')
     parser.add_argument('--list', action='store_true', help='Listar interesses disponíveis')
+    parser.add_argument('--construir-similares', action='store_true',
+                        help='Calcular a tabela de cursos similares (grava em SIMILARES_PATH)')
+    parser.add_argument('--k', type=int, default=10, help='Vizinhos por curso na tabela de similares')
+    parser.add_argument('--log', choices=list(NIVEIS), help='Nível das mensagens de andamento (padrão: LOG_NIVEL ou info)')
+    parser.add_argument('-q', '--silencioso', action='store_true', help='Não exibe mensagens de andamento nem erros')
     
     args = parser.parse_args()
     
     # Carrega variáveis de ambiente
     load_dotenv()
     
+    configurar_registro('silencioso' if args.silencioso else args.log)
+    
     # Caminhos das bases
     OFERTAS_PATH = os.getenv('OFERTAS_PATH')
     INTERESSES_PATH = os.getenv('INTERESSES_PATH')
     ESTRUTURA_PATH = os.getenv('ESTRUTURA_PATH')
     
     if not all([OFERTAS_PATH, INTERESSES_PATH, ESTRUTURA_PATH]):
-        print("❌ Erro: Configure as variáveis de ambiente:")
-        print("   OFERTAS_PATH, INTERESSES_PATH, ESTRUTURA_PATH")
+        logger.error("❌ Erro: Configure as variáveis de ambiente:")
+        logger.error("   OFERTAS_PATH, INTERESSES_PATH, ESTRUTURA_PATH")
         sys.exit(1)
     
     # Inicializa o sistema
-    print("🚀 Inicializando Sistema de Recomendação...")
+    logger.info("🚀 Inicializando Sistema de Recomendação...")
     try:
         sistema = SistemaRecomendacaoCursos(
             path_interesses=INTERESSES_PATH,
             path_ofertas=OFERTAS_PATH,
             path_estrutura=ESTRUTURA_PATH
         )
-        print("✅ Sistema inicializado com sucesso!\n")
+        logger.info("✅ Sistema inicializado com sucesso!\n")
     except Exception as e:
-        print(f"❌ Erro ao inicializar sistema: {e}")
+        logger.error("❌ Erro ao inicializar sistema: %s", e)
         sys.exit(1)
     
     # Modo: Estatísticas
@@ -65,6 +94,11 @@ Exemplos:
         mostrar_estatisticas(sistema)
         return
     
+    # Modo: Construção da tabela de similares
+    if args.construir_similares:
+        construir_similares(sistema, args.k)
+        return
+    
     # Modo: Listar interesses
     if args.list:
         listar_interesses(sistema)
@@ -72,12 +106,23 @@ Exemplos:
     
     # Modo: Processamento em batch
     if args.batch:
-        processar_batch(sistema, args.batch, args.output_dir)
+        processar_batch(sistema, args.batch, args.output_dir, args.workers, args.output,
+                        args.formato, args.retomar, args.tamanho_bloco)
+        return
+    
+    # Modo: Aluno
+    if args.aluno:
+        processar_aluno(sistema, args.aluno, args.output, args.limite)
+        return
+    
+    # Modo: Interesses de uma oferta
+    if args.oferta:
+        processar_oferta(sistema, args.oferta, args.output)
         return
     
     # Modo: Interesse único
     if args.interesse:
-        processar_interesse(sistema, args.interesse, args.output)
+        processar_interesse(sistema, args.interesse, args.output, args.limite)
         return
     
     # Modo interativo
@@ -107,6 +152,18 @@ def mostrar_estatisticas(sistema):
         percentual = (qtd / len(sistema.df_interesses)) * 100
         print(f"  {modalidade:20} {qtd:6} ({percentual:5.1f}%)")
 
+def construir_similares(sistema, k):
+    """Calcula a tabela de cursos similares (incremental se já existir)"""
+    if not sistema.path_similares:
+        logger.error("❌ Erro: Configure a variável de ambiente SIMILARES_PATH")
+        sys.exit(1)
+    
+    logger.info("🧮 Calculando tabela de cursos similares (k=%d)...", k)
+    tabela = sistema.construir_tabela_similares(k=k)
+    logger.info("✅ Tabela gravada em %s", sistema.path_similares)
+    logger.info("   Cursos: %d | Cursos EAD: %d",
+                len(tabela.particoes['geral']['consultas']), len(tabela.particoes['ead']['base']))
+
 def listar_interesses(sistema):
     """Lista interesses disponíveis"""
     interesses = sistema.listar_interesses_disponiveis()
@@ -123,128 +180,195 @@ def listar_interesses(sistema):
     print("=" * 80)
     print(f"Total: {len(interesses)} interesses listados")
 
-def processar_interesse(sistema, cod_interesse, output_file=None):
+def processar_interesse(sistema, cod_interesse, output_file=None, limite=None):
     """Processa um único interesse"""
-    print(f"🔍 Processando interesse: {cod_interesse}")
+    logger.info("🔍 Processando interesse: %s", cod_interesse)
     
     try:
-        recomendacoes = sistema.gerar_recomendacoes(cod_interesse)
+        recomendacoes = sistema.gerar_recomendacoes(cod_interesse, limite=limite)
         
         if recomendacoes is None or recomendacoes.empty:
-            print(f"⚠️  Nenhuma recomendação encontrada para o interesse {cod_interesse}")
+            logger.warning("⚠️  Nenhuma recomendação encontrada para o interesse %s", cod_interesse)
             return
         
-        # Mostra resumo
-        print(f"✅  {len(recomendacoes)} recomendações encontradas")
+        mostrar_recomendacoes(recomendacoes, output_file)
+    
+    except Exception as e:
+        logger.error("❌ Erro ao processar interesse %s: %s", cod_interesse, e)
+
+def processar_aluno(sistema, cod_aluno, output_file=None, limite=None):
+    """Processa todos os interesses de um aluno, com uma recomendação por oferta"""
+    logger.info("🔍 Processando aluno: %s", cod_aluno)
+    
+    try:
+        recomendacoes = sistema.gerar_recomendacoes_aluno(cod_aluno, limite=limite)
+        
+        if recomendacoes is None or recomendacoes.empty:
+            logger.warning("⚠️  Nenhuma recomendação encontrada para o aluno %s", cod_aluno)
+            return
+        
+        logger.info("📋 %d interesses do aluno avaliados", recomendacoes['COD_INTERESSE'].nunique())
+        mostrar_recomendacoes(recomendacoes, output_file, ['COD_INTERESSE', 'QTD_INTERESSES'])
+    
+    except Exception as e:
+        logger.error("❌ Erro ao processar aluno %s: %s", cod_aluno, e)
+
+def processar_oferta(sistema, cod_oferta, output_file=None):
+    """Lista os interesses que receberiam a oferta como recomendação"""
+    logger.info("🔍 Buscando interesses para a oferta: %s", cod_oferta)
+    
+    try:
+        interesses = sistema.interesses_para_oferta(cod_oferta)
+        
+        if interesses is None or interesses.empty:
+            logger.warning("⚠️  Nenhum interesse compatível com a oferta %s", cod_oferta)
+            return
+        
+        logger.info("✅  %d interesses (%d alunos) compatíveis", len(interesses), interesses['COD_ALUNO'].nunique())
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n📊 Distribuição por tipo de recomendação:")
+            for tipo, qtd in interesses['TIPO_INDICACAO'].value_counts().sort_index().items():
+                logger.info(f"  {tipo:30} {qtd:4} ({qtd/len(interesses)*100:5.1f}%)")
+        
+        if output_file:
+            if not output_file.endswith('.csv'):
+                output_file += '.csv'
+            interesses.to_csv(output_file, index=False, encoding='utf-8-sig')
+            logger.info("\n💾 Resultados salvos em: %s", output_file)
+    
+    except Exception as e:
+        logger.error("❌ Erro ao processar oferta %s: %s", cod_oferta, e)
+
+def mostrar_recomendacoes(recomendacoes, output_file=None, colunas_extras=()):
+    """Exibe o resumo das recomendações e as salva em CSV se solicitado"""
+    # Resumo (montado apenas se for exibido)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"✅  {len(recomendacoes)} recomendações encontradas")
         
         # Distribuição por tipo
-        print("\n📊 Distribuição por tipo de recomendação:")
+        logger.info("\n📊 Distribuição por tipo de recomendação:")
         dist = recomendacoes['TIPO_INDICACAO'].value_counts()
         for tipo, qtd in dist.items():
-            print(f"  {tipo:30} {qtd:4} ({qtd/len(recomendacoes)*100:5.1f}%)")
+            logger.info(f"  {tipo:30} {qtd:4} ({qtd/len(recomendacoes)*100:5.1f}%)")
         
         # Top 5 recomendações
-        print("\n🏅 TOP 5 RECOMENDAÇÕES:")
+        logger.info("\n🏅 TOP 5 RECOMENDAÇÕES:")
         top5 = recomendacoes.head(5)
         for i, (_, rec) in enumerate(top5.iterrows(), 1):
             distancia = f"{rec.get('DISTANCIA_KM', 0):.1f} km" if 'DISTANCIA_KM' in rec else "N/A"
             similaridade = f"{rec.get('SCORE_SIMILARIDADE', 0):.3f}" if 'SCORE_SIMILARIDADE' in rec else "N/A"
             
-            print(f"  {i}. {rec['TITULO_OFERTA'][:40]:40}")
-            print(f"     Tipo: {rec['TIPO_INDICACAO']:20} | Unidade: {rec.get('NOME_UNIDADE', 'N/A')}")
-            print(f"     Distância: {distancia:10} | Similaridade: {similaridade:8}")
-        
-        # Salva em arquivo se solicitado
-        if output_file:
-            if not output_file.endswith('.csv'):
-                output_file += '.csv'
-            
-            # Colunas para salvar
-            cols_save = [
-                'TIPO_INDICACAO', 'NIVEL_MATCH', 'COD_OFERTA',
-                'TITULO_OFERTA', 'AREA_OFERTA', 'MODALIDADE_OFERTA',
-                'NOME_UNIDADE', 'DATA_INICIO', 'COD_ALUNO',
-                'CURSO_INTERESSE', 'UNIDADE_INTERESSE'
-            ]
-            
-            if 'DISTANCIA_KM' in recomendacoes.columns:
-                cols_save.append('DISTANCIA_KM')
-            
-            if 'SCORE_SIMILARIDADE' in recomendacoes.columns:
-                cols_save.append('SCORE_SIMILARIDADE')
-            
-            recomendacoes[cols_save].to_csv(output_file, index=False, encoding='utf-8-sig')
-            print(f"\n💾 Resultados salvos em: {output_file}")
+            logger.info(f"  {i}. {rec['TITULO_OFERTA'][:40]:40}")
+            logger.info(f"     Tipo: {rec['TIPO_INDICACAO']:20} | Unidade: {rec.get('NOME_UNIDADE', 'N/A')}")
+            logger.info(f"     Distância: {distancia:10} | Similaridade: {similaridade:8}")
     
-    except Exception as e:
-        print(f"❌ Erro ao processar interesse {cod_interesse}: {e}")
+    # Salva em arquivo se solicitado
+    if output_file:
+        if not output_file.endswith('.csv'):
+            output_file += '.csv'
+        
+        # Colunas para salvar
+        cols_save = [
+            'TIPO_INDICACAO', 'NIVEL_MATCH', 'COD_OFERTA',
+            'TITULO_OFERTA', 'AREA_OFERTA', 'MODALIDADE_OFERTA',
+            'NOME_UNIDADE', 'DATA_INICIO', 'COD_ALUNO',
+            'CURSO_INTERESSE', 'UNIDADE_INTERESSE', *colunas_extras
+        ]
+        
+        if 'DISTANCIA_KM' in recomendacoes.columns:
+            cols_save.append('DISTANCIA_KM')
+        
+        if 'SCORE_SIMILARIDADE' in recomendacoes.columns:
+            cols_save.append('SCORE_SIMILARIDADE')
+        
+        recomendacoes[cols_save].to_csv(output_file, index=False, encoding='utf-8-sig')
+        logger.info("\n💾 Resultados salvos em: %s", output_file)
 
-def processar_batch(sistema, batch_file, output_dir=None):
-    """Processa múltiplos interesses de um arquivo"""
-    print(f"📦 Processando em batch: {batch_file}")
+def processar_batch(sistema, batch_file, output_dir=None, workers=1, output=None, formato=None,
+                    retomar=False, tamanho_bloco=TAMANHO_BLOCO_BATCH):
+    """Processa múltiplos interesses de um arquivo, gravando os resultados por blocos"""
+    logger.info("📦 Processando em batch: %s", batch_file)
     
     try:
         # Lê a lista de interesses
         batch_df = pd.read_csv(batch_file)
         
         if 'COD_INTERESSE' not in batch_df.columns:
-            print("❌ Arquivo batch deve conter coluna 'COD_INTERESSE'")
+            logger.error("❌ Arquivo batch deve conter coluna 'COD_INTERESSE'")
             return
         
-        interesses = batch_df['COD_INTERESSE'].tolist()
-        print(f"📋 {len(interesses)} interesses para processar")
+        # Interesses fora da base geram um único aviso e não entram nos blocos
+        interesses = list(dict.fromkeys(batch_df['COD_INTERESSE'].tolist()))
+        interesses = sistema.filtrar_interesses_conhecidos(interesses)
+        logger.info("📋 %d interesses para processar", len(interesses))
         
-        # Processa cada interesse
-        resultados_totais = []
+        # Define o destino (um caminho fixo é necessário para retomar)
+        if output:
+            output_path = output
+        elif retomar:
+            logger.error("❌ Informe --output para retomar um processamento")
+            return
+        else:
+            extensao = formato or 'csv'
+            output_path = f"recomendacoes_batch_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                output_path = os.path.join(output_dir, output_path)
         
-        for i, cod_interesse in enumerate(interesses, 1):
-            print(f"\n[{i}/{len(interesses)}] Processando: {cod_interesse}")
-            
-            try:
-                recomendacoes = sistema.gerar_recomendacoes(cod_interesse)
+        escritor = criar_escritor(output_path, formato, retomar=retomar)
+        
+        if retomar and escritor.interesses_concluidos:
+            interesses = [cod for cod in interesses if cod not in escritor.interesses_concluidos]
+            logger.info("⏭️  %d interesses já gravados; %d restantes", len(escritor.interesses_concluidos), len(interesses))
+        
+        if workers > 1:
+            logger.info("⚙️  %d workers", workers)
+        
+        # Apenas os totais são mantidos em memória; cada bloco é gravado e descartado
+        total_recomendacoes = 0
+        interesses_com_resultado = 0
+        dist_tipo = pd.Series(dtype='int64')
+        
+        with escritor, BarraProgresso(len(interesses), '💾 Interesses gravados') as progresso:
+            for inicio in range(0, len(interesses), tamanho_bloco):
+                bloco = interesses[inicio:inicio + tamanho_bloco]
                 
-                if recomendacoes is not None and not recomendacoes.empty:
-                    recomendacoes['COD_INTERESSE_ORIGEM'] = cod_interesse
-                    resultados_totais.append(recomendacoes)
-                    print(f"   ✅ {len(recomendacoes)} recomendações")
-                else:
-                    print(f"   ⚠️  Nenhuma recomendação")
-            
-            except Exception as e:
-                print(f"   ❌ Erro: {e}")
-                continue
+                # Processa o bloco em passadas vetorizadas, divididas entre os workers
+                resultados = gerar_recomendacoes_paralelo(sistema, bloco, workers)
+                
+                if not resultados.empty:
+                    # Mantém o layout de saída anterior (código do interesse na última coluna)
+                    resultados['COD_INTERESSE_ORIGEM'] = resultados.pop('COD_INTERESSE')
+                    
+                    total_recomendacoes += len(resultados)
+                    interesses_com_resultado += resultados['COD_INTERESSE_ORIGEM'].nunique()
+                    dist_tipo = dist_tipo.add(resultados['TIPO_INDICACAO'].value_counts(), fill_value=0)
+                
+                escritor.escrever(resultados, bloco)
+                progresso.atualizar(len(bloco))
         
-        # Consolida resultados
-        if resultados_totais:
-            resultados_consolidados = pd.concat(resultados_totais, ignore_index=True)
-            
-            # Salva resultados
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-                output_path = os.path.join(output_dir, f"recomendacoes_batch_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv")
-            else:
-                output_path = f"recomendacoes_batch_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            resultados_consolidados.to_csv(output_path, index=False, encoding='utf-8-sig')
+        if total_recomendacoes:
+            logger.info("   ✅ %d interesses com recomendações", interesses_com_resultado)
+            if interesses_com_resultado < len(interesses):
+                logger.warning("   ⚠️  %d interesses sem recomendação", len(interesses) - interesses_com_resultado)
             
-            print(f"\n🎉 PROCESSAMENTO BATCH CONCLUÍDO")
-            print(f"   Total de interesses processados: {len(interesses)}")
-            print(f"   Total de recomendações geradas: {len(resultados_consolidados)}")
-            print(f"   Arquivo de saída: {output_path}")
+            logger.info("\n🎉 PROCESSAMENTO BATCH CONCLUÍDO")
+            logger.info("   Total de interesses processados: %d", len(interesses))
+            logger.info("   Total de recomendações geradas: %d", total_recomendacoes)
+            logger.info("   Arquivo de saída: %s", output_path)
             
             # Estatísticas do batch
-            print(f"\n📊 ESTATÍSTICAS DO BATCH:")
-            print(f"   Média de recomendações por interesse: {len(resultados_consolidados)/len(interesses):.1f}")
+            logger.info("\n📊 ESTATÍSTICAS DO BATCH:")
+            logger.info("   Média de recomendações por interesse: %.1f", total_recomendacoes/len(interesses))
             
-            dist_tipo = resultados_consolidados['TIPO_INDICACAO'].value_counts()
-            for tipo, qtd in dist_tipo.items():
-                percent = (qtd / len(resultados_consolidados)) * 100
-                print(f"   {tipo:30} {qtd:6} ({percent:5.1f}%)")
+            for tipo, qtd in dist_tipo.sort_values(ascending=False).items():
+                logger.info("   %-30s %6d (%5.1f%%)", tipo, qtd, (qtd / total_recomendacoes) * 100)
         else:
-            print("\n⚠️  Nenhuma recomendação gerada no processamento batch")
+            logger.warning("\n⚠️  Nenhuma recomendação gerada no processamento batch")
     
     except Exception as e:
-        print(f"❌ Erro no processamento batch: {e}")
+        logger.error("❌ Erro no processamento batch: %s", e)
 
 def modo_interativo(sistema):
     """Modo interativo da CLI"""
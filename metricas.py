@@ -0,0 +1,145 @@
+"""
+Métricas de execução das estratégias de recomendação
+Tempo, linhas candidatas examinadas e linhas retornadas por etapa, por chamada e agregadas
+(com exposição no formato texto do Prometheus).
+"""
+
+import json
+import logging
+
+logger = logging.getLogger('metricas')
+
+# Limites (segundos) dos buckets do histograma de latência
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class EstatisticasRecomendacao:
+    """
+    Métricas de uma chamada de gerar_recomendacoes.
+
+    Cada etapa registra o tempo (segundos), as linhas candidatas examinadas e as
+    linhas retornadas; etapas puladas pelo limite ficam em etapas_ignoradas. Na
+    consolidação, candidatas são as linhas concatenadas das estratégias e
+    retornadas são as recomendações finais. Chamadas atendidas pelo cache de
+    resultados têm cache=True e nenhuma etapa.
+    """
+
+    def __init__(self, cod_interesse):
+        self.cod_interesse = cod_interesse
+        self.etapas = {}
+        self.etapas_ignoradas = []
+        self.cache = False
+        self.tempo_total = 0.0
+
+    def registrar(self, etapa, tempo, candidatas, retornadas):
+        self.etapas[etapa] = {
+            'tempo': tempo,
+            'candidatas': int(candidatas),
+            'retornadas': int(retornadas)
+        }
+
+    def ignorar(self, etapa):
+        """Etapa não executada (limite de recomendações já atingido)"""
+        self.etapas_ignoradas.append(etapa)
+
+    def para_dict(self):
+        """Representação serializável (tempos em milissegundos)"""
+        cod = self.cod_interesse
+        return {
+            'cod_interesse': cod.item() if hasattr(cod, 'item') else cod,
+            'tempo_total_ms': round(self.tempo_total * 1000, 3),
+            'cache': self.cache,
+            'etapas': {
+                etapa: {
+                    'tempo_ms': round(dados['tempo'] * 1000, 3),
+                    'candidatas': dados['candidatas'],
+                    'retornadas': dados['retornadas']
+                }
+                for etapa, dados in self.etapas.items()
+            },
+            'etapas_ignoradas': self.etapas_ignoradas
+        }
+
+    def para_json(self):
+        """Linha JSON para logs estruturados"""
+        return json.dumps(self.para_dict(), ensure_ascii=False)
+
+    def __repr__(self):
+        etapas = ', '.join(
+            f"{etapa}={dados['tempo'] * 1000:.1f}ms/{dados['candidatas']}→{dados['retornadas']}"
+            for etapa, dados in self.etapas.items()
+        )
+        return f'EstatisticasRecomendacao(cod_interesse={self.cod_interesse}, total={self.tempo_total * 1000:.1f}ms, {etapas})'
+
+
+class ColetorMetricas:
+    """Agrega as estatísticas de várias chamadas: histograma de latência e contadores por etapa"""
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = limites
+        self.chamadas = 0
+        self.acertos_cache = 0
+        self.etapas = {}
+
+    def _etapa(self, etapa):
+        if etapa not in self.etapas:
+            self.etapas[etapa] = {
+                'buckets': [0] * len(self.limites),
+                'contagem': 0,
+                'soma': 0.0,
+                'candidatas': 0,
+                'retornadas': 0
+            }
+        return self.etapas[etapa]
+
+    def registrar(self, estatisticas):
+        self.chamadas += 1
+        self.acertos_cache += estatisticas.cache
+
+        for etapa, dados in [*estatisticas.etapas.items(), ('total', {'tempo': estatisticas.tempo_total})]:
+            agregado = self._etapa(etapa)
+            agregado['contagem'] += 1
+            agregado['soma'] += dados['tempo']
+            agregado['candidatas'] += dados.get('candidatas', 0)
+            agregado['retornadas'] += dados.get('retornadas', 0)
+            for i, limite in enumerate(self.limites):
+                if dados['tempo'] <= limite:
+                    agregado['buckets'][i] += 1
+
+    def exposicao_prometheus(self, prefixo='recomendacao'):
+        """Métricas agregadas no formato texto de exposição do Prometheus"""
+        linhas = [
+            f'# HELP {prefixo}_chamadas_total Chamadas de gerar_recomendacoes',
+            f'# TYPE {prefixo}_chamadas_total counter',
+            f'{prefixo}_chamadas_total {self.chamadas}',
+            f'# HELP {prefixo}_cache_acertos_total Chamadas atendidas pelo cache de resultados',
+            f'# TYPE {prefixo}_cache_acertos_total counter',
+            f'{prefixo}_cache_acertos_total {self.acertos_cache}',
+            f'# HELP {prefixo}_etapa_duracao_segundos Duração de cada etapa de gerar_recomendacoes',
+            f'# TYPE {prefixo}_etapa_duracao_segundos histogram'
+        ]
+
+        for etapa, dados in self.etapas.items():
+            for limite, quantidade in zip(self.limites, dados['buckets']):
+                linhas.append(f'{prefixo}_etapa_duracao_segundos_bucket{{etapa="{etapa}",le="{limite}"}} {quantidade}')
+            linhas.append(f'{prefixo}_etapa_duracao_segundos_bucket{{etapa="{etapa}",le="+Inf"}} {dados["contagem"]}')
+            linhas.append(f'{prefixo}_etapa_duracao_segundos_sum{{etapa="{etapa}"}} {dados["soma"]:.6f}')
+            linhas.append(f'{prefixo}_etapa_duracao_segundos_count{{etapa="{etapa}"}} {dados["contagem"]}')
+
+        for metrica, chave, descricao in (
+            ('linhas_candidatas_total', 'candidatas', 'Linhas candidatas examinadas por etapa'),
+            ('linhas_retornadas_total', 'retornadas', 'Linhas retornadas por etapa')
+        ):
+            linhas.append(f'# HELP {prefixo}_{metrica} {descricao}')
+            linhas.append(f'# TYPE {prefixo}_{metrica} counter')
+            for etapa, dados in self.etapas.items():
+                if etapa != 'total':
+                    linhas.append(f'{prefixo}_{metrica}{{etapa="{etapa}"}} {dados[chave]}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+def registrar_log(estatisticas):
+    """Emite as métricas da chamada como uma linha JSON (logger 'metricas', nível INFO)"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(estatisticas.para_json())
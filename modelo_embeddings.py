@@ -0,0 +1,39 @@
+"""
+Carregamento sob demanda do modelo de embeddings
+O pacote sentence_transformers só é importado no primeiro encode
+"""
+
+import time
+
+from registro import logger
+
+
+class ModeloEmbeddings:
+    """
+    Envoltório preguiçoso de um SentenceTransformer.
+
+    Expõe o mesmo método `encode`; o import da biblioteca e o carregamento dos
+    pesos acontecem apenas na primeira chamada, de modo que caminhos que não
+    usam similaridade semântica (estatísticas, listagens) não pagam esse custo.
+    """
+
+    def __init__(self, nome_modelo):
+        self.nome_modelo = nome_modelo
+        self._modelo = None
+
+    @property
+    def carregado(self):
+        return self._modelo is not None
+
+    def _carregar(self):
+        t1 = time.time()
+
+        from sentence_transformers import SentenceTransformer
+
+        self._modelo = SentenceTransformer(self.nome_modelo)
+        logger.info('⌛ Modelo de embeddings carregado em %.2f segundos', time.time() - t1)
+
+    def encode(self, textos, **kwargs):
+        if self._modelo is None:
+            self._carregar()
+        return self._modelo.encode(textos, **kwargs)
@@ -0,0 +1,69 @@
+"""
+Modo de memória otimizada
+Colunas de texto repetitivas como categóricas e códigos inteiros com o menor tipo possível
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from registro import logger
+
+# Colunas de texto com poucos valores distintos, por DataFrame do sistema.
+# df_cursos fica de fora: seus textos são concatenados (AREA_TITULO) ao preparar ofertas e embeddings.
+COLUNAS_CATEGORICAS = {
+    'df_ofertas': ['TITULO_OFERTA', 'AREA_OFERTA', 'MODALIDADE_OFERTA', 'AREA_TITULO'],
+    'df_interesses': ['TITULO_INTERESSE', 'MODALIDADE_INTERESSE', 'AREA_INTERESSE', 'UNIDADE_INTERESSE'],
+    'df_unidades': ['NOME_UNIDADE'],
+    'df_trilhas': ['AREA_PROFISSIONAL']
+}
+
+
+def memoria_mb(df):
+    """Memória ocupada pelo DataFrame (incluindo o conteúdo dos textos), em MB"""
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def compactar_dataframe(df, colunas_categoricas=()):
+    """
+    Retorna uma cópia compacta do DataFrame.
+
+    Args:
+        df: DataFrame original
+        colunas_categoricas: Colunas de texto convertidas para category
+
+    Returns:
+        DataFrame com as colunas categóricas convertidas e inteiros com sinal
+        reduzidos ao menor tipo que comporta os valores atuais
+    """
+    df = df.copy()
+
+    for coluna in colunas_categoricas:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+
+    for coluna in df.columns:
+        if pd.api.types.is_signed_integer_dtype(df[coluna].dtype) and df[coluna].dtype.itemsize > 1:
+            df[coluna] = pd.to_numeric(df[coluna], downcast='integer')
+
+    return df
+
+
+def relatorio_memoria(antes, depois):
+    """
+    Registra a memória de cada DataFrame antes e depois da compactação.
+
+    Args:
+        antes, depois: Dicionários {nome: memória em MB}
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
+    logger.info("📊 Memória por DataFrame (MB):")
+    for nome in antes:
+        variacao = depois[nome] / antes[nome] - 1 if antes[nome] else 0
+        logger.info(f"   {nome:15} {antes[nome]:10.2f} → {depois[nome]:10.2f}  ({variacao:+.1%})")
+
+    total_antes, total_depois = np.sum(list(antes.values())), np.sum(list(depois.values()))
+    logger.info(f"   {'TOTAL':15} {total_antes:10.2f} → {total_depois:10.2f}")
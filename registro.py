@@ -0,0 +1,123 @@
+"""
+Saída de andamento do sistema
+Logger com níveis (mensagens no mesmo formato dos prints, com emojis) e barra de
+progresso agrupada. As mensagens usam formatação preguiçosa (`logger.info('%d', x)`),
+de modo que no modo silencioso nenhuma mensagem chega a ser formatada.
+"""
+
+import contextlib
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger('recomendacao')
+
+NIVEIS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'aviso': logging.WARNING,
+    'erro': logging.ERROR,
+    'silencioso': logging.CRITICAL + 10
+}
+
+# Intervalo mínimo (segundos) entre duas atualizações da barra de progresso
+INTERVALO_PROGRESSO = 0.5
+
+
+def configurar_registro(nivel=None, stream=None):
+    """
+    Define o nível e o destino das mensagens.
+
+    Args:
+        nivel: 'debug', 'info', 'aviso', 'erro' ou 'silencioso'
+            (padrão: variável de ambiente LOG_NIVEL ou 'info')
+        stream: Destino das mensagens (padrão: stdout)
+    """
+    nivel = (nivel or os.getenv('LOG_NIVEL') or 'info').lower()
+    if nivel not in NIVEIS:
+        raise ValueError(f"Nível de log desconhecido: {nivel} (opções: {', '.join(NIVEIS)})")
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    logger.handlers = [handler]
+    logger.setLevel(NIVEIS[nivel])
+    logger.propagate = False
+
+
+@contextlib.contextmanager
+def nivel_temporario(nivel):
+    """Usa o nível informado dentro do bloco, restaurando o anterior ao sair"""
+    if nivel not in NIVEIS:
+        raise ValueError(f"Nível de log desconhecido: {nivel} (opções: {', '.join(NIVEIS)})")
+
+    anterior = logger.level
+    logger.setLevel(NIVEIS[nivel])
+    try:
+        yield
+    finally:
+        logger.setLevel(anterior)
+
+
+class BarraProgresso:
+    """
+    Barra de progresso que redesenha no máximo a cada INTERVALO_PROGRESSO segundos.
+
+    Em terminal, a linha é reescrita no lugar; fora dele (arquivo, pipe), cada
+    atualização vira uma linha. Abaixo do nível INFO não faz nada.
+    """
+
+    def __init__(self, total, descricao='', intervalo=INTERVALO_PROGRESSO):
+        self.total = total
+        self.descricao = descricao
+        self.intervalo = intervalo
+        self.atual = 0
+        self.ativa = logger.isEnabledFor(logging.INFO)
+        self._inicio = time.perf_counter()
+        self._ultima_exibicao = 0.0
+
+        stream = logger.handlers[0].stream if logger.handlers else sys.stdout
+        self._stream = stream
+        self._terminal = self.ativa and hasattr(stream, 'isatty') and stream.isatty()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def atualizar(self, quantidade=1):
+        self.atual += quantidade
+        if not self.ativa:
+            return
+
+        agora = time.perf_counter()
+        if agora - self._ultima_exibicao >= self.intervalo or self.atual >= self.total:
+            self._ultima_exibicao = agora
+            self._exibir(agora)
+
+    def _exibir(self, agora):
+        fracao = self.atual / self.total if self.total else 1
+        decorrido = agora - self._inicio
+        taxa = self.atual / decorrido if decorrido else 0
+        preenchido = int(fracao * 30)
+
+        linha = (f"   {self.descricao} [{'█' * preenchido}{'░' * (30 - preenchido)}] "
+                 f"{self.atual}/{self.total} ({fracao:.0%}) {taxa:.1f}/s")
+
+        self._stream.write(f'\r{linha}' if self._terminal else f'{linha}\n')
+        self._stream.flush()
+
+    def fechar(self):
+        if self.ativa and self._terminal:
+            self._stream.write('\n')
+            self._stream.flush()
+        self.ativa = False
+
+
+configurar_registro()
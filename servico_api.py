@@ -0,0 +1,238 @@
+"""
+Serviço HTTP (ASGI) do Sistema de Recomendação
+Carrega o sistema uma única vez e agrupa requisições concorrentes em micro-lotes
+processados por gerar_recomendacoes_lote.
+
+Execução:
+    uvicorn servico_api:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import Body, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+
+from cache_resultados import CacheResultados
+from registro import logger
+from sistema_recomendacao import TAMANHO_CACHE_RESULTADOS, TTL_CACHE_RESULTADOS, SistemaRecomendacaoCursos
+
+# Janela de espera para agrupar requisições concorrentes em um mesmo lote
+JANELA_LOTE_MS = float(os.getenv('JANELA_LOTE_MS', '10'))
+
+# Quantidade máxima de interesses processados em um lote
+TAMANHO_MAX_LOTE = int(os.getenv('TAMANHO_MAX_LOTE', '256'))
+
+# Interesses serializados por bloco na resposta em streaming
+TAMANHO_BLOCO_RESPOSTA = 50
+
+ERRO_INTERESSE_NAO_ENCONTRADO = 'interesse não encontrado'
+
+
+class LoteadorRecomendacoes:
+    """
+    Agrupa pedidos de recomendação que chegam dentro de uma janela curta.
+
+    Cada pedido recebe um Future; um único consumidor monta o lote, executa
+    gerar_recomendacoes_lote em uma thread (o sistema não é thread-safe, então
+    há no máximo um lote em execução) e distribui o resultado por interesse.
+    
+    As respostas já serializadas ficam em um cache LRU/TTL por interesse, que é
+    descartado quando as ofertas ou a tabela de similares do sistema mudam.
+    """
+
+    def __init__(self, sistema, janela_ms=JANELA_LOTE_MS, tamanho_max=TAMANHO_MAX_LOTE):
+        self.sistema = sistema
+        self.janela = janela_ms / 1000
+        self.tamanho_max = tamanho_max
+        self.fila = asyncio.Queue()
+        self.tarefa = None
+        self.lotes_processados = 0
+        self.interesses_processados = 0
+        self.cache = CacheResultados(TAMANHO_CACHE_RESULTADOS, TTL_CACHE_RESULTADOS)
+        self._versao_cache = sistema.versao_dados
+
+    def iniciar(self):
+        self.tarefa = asyncio.create_task(self._consumir())
+
+    async def parar(self):
+        if self.tarefa is not None:
+            self.tarefa.cancel()
+            try:
+                await self.tarefa
+            except asyncio.CancelledError:
+                pass
+
+    def existe(self, cod_interesse):
+        """Indica se o interesse está na base (desconhecidos não entram nos lotes)"""
+        return cod_interesse in self.sistema.posicao_interesse
+
+    async def recomendar(self, cod_interesse):
+        """Recomendações de um interesse, como lista de registros JSON-serializáveis"""
+        em_cache = self._do_cache(cod_interesse)
+        if em_cache is not None:
+            return em_cache
+        
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila.put((cod_interesse, futuro))
+        return await futuro
+
+    async def _coletar_lote(self):
+        """Aguarda o primeiro pedido e agrega os que chegarem dentro da janela"""
+        pedidos = [await self.fila.get()]
+        limite = time.monotonic() + self.janela
+
+        while len(pedidos) < self.tamanho_max:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                pedidos.append(await asyncio.wait_for(self.fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+
+        return pedidos
+
+    async def _consumir(self):
+        while True:
+            pedidos = await self._coletar_lote()
+            cods = list(dict.fromkeys(cod for cod, _ in pedidos))
+
+            try:
+                por_interesse = await asyncio.to_thread(self._processar, cods)
+            except Exception as e:
+                for _, futuro in pedidos:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+
+            self.lotes_processados += 1
+            self.interesses_processados += len(cods)
+
+            for cod, futuro in pedidos:
+                if not futuro.done():
+                    futuro.set_result(por_interesse.get(cod, '[]'))
+
+    def _do_cache(self, cod_interesse):
+        # Resultados de uma versão anterior dos dados (ofertas/similares) são descartados
+        if self._versao_cache != self.sistema.versao_dados:
+            self.cache.limpar()
+            self._versao_cache = self.sistema.versao_dados
+        return self.cache.obter(cod_interesse)
+
+    def _processar(self, cods):
+        """Executa o lote, serializa as recomendações de cada interesse e guarda no cache"""
+        versao = self.sistema.versao_dados
+        resultado = self.sistema.gerar_recomendacoes_lote(cods)
+
+        por_interesse = {} if resultado.empty else {
+            cod: grupo.drop(columns='COD_INTERESSE').to_json(
+                orient='records', date_format='iso', force_ascii=False
+            )
+            for cod, grupo in resultado.groupby('COD_INTERESSE', sort=False)
+        }
+
+        if versao == self.sistema.versao_dados:
+            for cod in cods:
+                self.cache.guardar(cod, por_interesse.get(cod, '[]'))
+
+        return por_interesse
+
+
+def _criar_sistema():
+    """Inicializa o sistema a partir das variáveis de ambiente (como main_cli.py)"""
+    load_dotenv()
+
+    caminhos = {
+        'path_interesses': os.getenv('INTERESSES_PATH'),
+        'path_ofertas': os.getenv('OFERTAS_PATH'),
+        'path_estrutura': os.getenv('ESTRUTURA_PATH')
+    }
+    if not all(caminhos.values()):
+        raise RuntimeError('Configure as variáveis de ambiente OFERTAS_PATH, INTERESSES_PATH, ESTRUTURA_PATH')
+
+    sistema = SistemaRecomendacaoCursos(**caminhos)
+
+    # Evita que a primeira requisição pague o carregamento dos índices
+    sistema.preparar_busca_semantica()
+    return sistema
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    logger.info("🚀 Inicializando Sistema de Recomendação...")
+    app.state.loteador = LoteadorRecomendacoes(_criar_sistema())
+    app.state.loteador.iniciar()
+    logger.info("✅ Serviço pronto (janela de lote: %g ms, lote máximo: %d)", JANELA_LOTE_MS, TAMANHO_MAX_LOTE)
+    yield
+    await app.state.loteador.parar()
+
+
+app = FastAPI(title='Sistema de Recomendação de Cursos', lifespan=ciclo_de_vida)
+
+
+def _item_json(cod_interesse, recomendacoes_json):
+    return f'{{"cod_interesse": {cod_interesse}, "recomendacoes": {recomendacoes_json}}}'
+
+
+def _item_erro_json(cod_interesse, erro):
+    return json.dumps({'cod_interesse': cod_interesse, 'erro': erro}, ensure_ascii=False)
+
+
+@app.get('/health')
+async def health():
+    loteador = app.state.loteador
+    return {
+        'status': 'ok',
+        'lotes_processados': loteador.lotes_processados,
+        'interesses_processados': loteador.interesses_processados,
+        'cache': {'entradas': len(loteador.cache), 'acertos': loteador.cache.acertos, 'falhas': loteador.cache.falhas}
+    }
+
+
+@app.get('/recommendations/{cod_interesse}')
+async def recomendacoes(cod_interesse: int):
+    if not app.state.loteador.existe(cod_interesse):
+        raise HTTPException(status_code=404, detail=ERRO_INTERESSE_NAO_ENCONTRADO)
+    
+    recomendacoes_json = await app.state.loteador.recomendar(cod_interesse)
+
+    async def gerar():
+        yield _item_json(cod_interesse, recomendacoes_json)
+
+    return StreamingResponse(gerar(), media_type='application/json')
+
+
+@app.post('/recommendations')
+async def recomendacoes_bulk(cod_interesses: list[int] = Body(..., embed=True)):
+    """
+    Recomendações para vários interesses.
+
+    Corpo: {"cod_interesses": [1, 2, 3]}. A resposta é um array JSON enviado em
+    streaming, um item por interesse, na ordem recebida; interesses inexistentes
+    aparecem como {"cod_interesse": X, "erro": "interesse não encontrado"}.
+    """
+    loteador = app.state.loteador
+    cods = list(dict.fromkeys(cod_interesses))
+    pendentes = [
+        asyncio.ensure_future(loteador.recomendar(cod)) if loteador.existe(cod) else None
+        for cod in cods
+    ]
+
+    async def gerar():
+        yield '['
+        for inicio in range(0, len(cods), TAMANHO_BLOCO_RESPOSTA):
+            bloco = []
+            for i in range(inicio, min(inicio + TAMANHO_BLOCO_RESPOSTA, len(cods))):
+                if pendentes[i] is None:
+                    bloco.append(_item_erro_json(cods[i], ERRO_INTERESSE_NAO_ENCONTRADO))
+                else:
+                    bloco.append(_item_json(cods[i], await pendentes[i]))
+            yield (',' if inicio else '') + ','.join(bloco)
+        yield ']'
+
+    return StreamingResponse(gerar(), media_type='application/json')
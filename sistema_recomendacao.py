@@ -6,22 +6,90 @@ Sistema híbrido que combina múltiplas estratégias de matching
 import numpy as np
 import pandas as pd
 from datetime import datetime
-import math
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
+import logging
 import os
 import time
+from functools import lru_cache
+
+from cache_embeddings import CacheEmbeddings
+from modelo_embeddings import ModeloEmbeddings
+from indice_vetorial import assinatura_catalogo, carregar_indice, criar_indice
+from snapshot import carregar_snapshot, salvar_embeddings, salvar_snapshot
+from otimizacao_memoria import COLUNAS_CATEGORICAS, compactar_dataframe, memoria_mb, relatorio_memoria
+from tabela_similares import K_PADRAO, TabelaSimilares
+from cache_resultados import CacheResultados
+from metricas import ColetorMetricas, EstatisticasRecomendacao, registrar_log
+from registro import logger
 
 load_dotenv()
 
+NOME_MODELO = 'paraphrase-multilingual-mpnet-base-v2'
+
+# Quantidade de cursos fora do catálogo com embedding mantido em memória
+TAMANHO_CACHE_CONSULTAS = 1024
+
+# Prioridade de cada tipo de indicação (menor = mais relevante)
+ORDEM_PRIORIDADE = {
+    '1.MATCH_COMPLETO': 1,
+    '2.OUTRA_UNIDADE': 2,
+    '3.TRILHA_PROFISSIONAL': 3,
+    '4.SIMILARIDADE_SEMANTICA': 4,
+    '5.MODALIDADE_EAD': 5
+}
+
+# Score mínimo para manter recomendações baseadas em similaridade (aplicado na busca de similares).
+# Similaridade cosseno: 1.0 = curso idêntico, 0.0 = totalmente diferente;
+# > 0.7 geralmente indica similaridade "boa o suficiente"
+LIMIAR_SIMILARIDADE = 0.7
+
+# Cache de recomendações finais por interesse: máximo de entradas (0 desabilita) e validade em segundos
+TAMANHO_CACHE_RESULTADOS = int(os.getenv('CACHE_RESULTADOS', '1024'))
+TTL_CACHE_RESULTADOS = float(os.getenv('CACHE_RESULTADOS_TTL', '600'))
+
+# Campos do interesse repassados às estratégias (lidos uma única vez por chamada)
+COLUNAS_REGISTRO_INTERESSE = [
+    'COD_INTERESSE', 'COD_ALUNO', 'COD_CURSO', 'COD_UNIDADE', 'DATA_INTERESSE', 'MASCARA_AGENDA',
+    'TITULO_INTERESSE', 'UNIDADE_INTERESSE', 'AREA_INTERESSE', 'MODALIDADE_INTERESSE'
+]
+
+# Códigos listados no aviso de interesses desconhecidos do processamento em lote
+AMOSTRA_DESCONHECIDOS = 5
+
+# Sentinela de ausência no cache (None é um resultado válido: sem recomendações)
+_AUSENTE = object()
+
+# Abas lidas da planilha de estrutura (em uma única abertura do arquivo)
+ABAS_ESTRUTURA = ['UNIDADES', 'CATALOGO_CURSOS', 'TRILHAS']
+
+COLUNAS_DIAS = ['DIA_SEG', 'DIA_TER', 'DIA_QUA', 'DIA_QUI', 'DIA_SEX', 'DIA_SAB']
+COLUNAS_TURNOS = ['TURNO_MANHA', 'TURNO_TARDE', 'TURNO_NOITE']
+
+# Máscara de agenda (coluna MASCARA_AGENDA, uint16): bits 0-5 = SEG..SAB, bits 6-8 = MANHA/TARDE/NOITE
+PESOS_AGENDA = (1 << np.arange(len(COLUNAS_DIAS) + len(COLUNAS_TURNOS))).astype(np.uint16)
+BITS_DIAS = np.uint16(0b000111111)
+BITS_TURNOS = np.uint16(0b111000000)
+
+def haversine_vetorizado(lat1, lon1, lat2, lon2, raio_terra=6371):
+    """Distância em km pela fórmula de Haversine, vetorizada (aceita arrays com broadcasting)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    
+    return raio_terra * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
 class SistemaRecomendacaoCursos:
     """
     Sistema principal de recomendação que implementa múltiplas estratégias
     de matching entre interesses de alunos e ofertas de cursos.
     """
     
-    def __init__(self, path_interesses, path_ofertas, path_estrutura):
+    def __init__(self, path_interesses, path_ofertas, path_estrutura, path_cache_embeddings=None,
+                 path_similares=None, tipo_indice=None, path_indices=None, parametros_indice=None,
+                 path_snapshot=None, modelo=None, otimizar_memoria=None, raio_km=None, k_unidades=None):
         """
         Inicializa o sistema carregando todas as bases de dados necessárias.
         
@@ -29,64 +97,254 @@ class SistemaRecomendacaoCursos:
             path_interesses: Caminho para base de interesses
             path_ofertas: Caminho para base de ofertas
             path_estrutura: Caminho para estrutura de dados (cursos, unidades)
+            path_cache_embeddings: Diretório do cache persistente de embeddings
+                (padrão: variável de ambiente EMBEDDINGS_CACHE_DIR; sem cache se ausente)
+            path_similares: Arquivo .npz com a tabela de cursos similares pré-calculada
+                (padrão: variável de ambiente SIMILARES_PATH)
+            tipo_indice: Backend da busca por similaridade, 'exato' ou 'ivf'
+                (padrão: variável de ambiente INDICE_SIMILARIDADE ou 'exato')
+            path_indices: Diretório onde os índices vetoriais são persistidos
+                (padrão: variável de ambiente INDICE_DIR; sem persistência se ausente)
+            parametros_indice: Parâmetros extras do backend (ex.: {'n_sondas': 16})
+            path_snapshot: Diretório do snapshot compilado das bases processadas
+                (padrão: variável de ambiente SNAPSHOT_DIR; sem snapshot se ausente)
+            modelo: Objeto com método encode (padrão: SentenceTransformer carregado
+                apenas no primeiro uso semântico)
+            otimizar_memoria: Usa categóricas e inteiros compactos nas bases e reporta a
+                memória antes e depois (padrão: variável de ambiente OTIMIZAR_MEMORIA)
+            raio_km: Distância máxima das outras unidades no match 2
+                (padrão: variável de ambiente RAIO_UNIDADES_KM; sem limite se ausente)
+            k_unidades: Quantidade máxima de outras unidades (as mais próximas) no match 2
+                (padrão: variável de ambiente K_UNIDADES; sem limite se ausente)
         """
         
         t1 = time.time()
         
-        # Carregamento das bases
-        self.df_unidades, self.unidade_coord_dict = self._carregar_unidades(path_estrutura)
-        print(f'⌛ Unidades carregadas')
+        path_cache_embeddings = path_cache_embeddings or os.getenv('EMBEDDINGS_CACHE_DIR')
+        self.cache_embeddings = (
+            CacheEmbeddings(path_cache_embeddings, NOME_MODELO) if path_cache_embeddings else None
+        )
         
-        self.df_cursos = self._carregar_cursos(path_estrutura)
-        print(f'⌛ Cursos carregados')
+        # Snapshot compilado (válido apenas se as fontes não mudaram)
+        fontes = {'interesses': path_interesses, 'ofertas': path_ofertas, 'estrutura': path_estrutura}
+        self.path_snapshot = path_snapshot or os.getenv('SNAPSHOT_DIR')
+        estado = carregar_snapshot(self.path_snapshot, fontes, NOME_MODELO) if self.path_snapshot else None
         
-        self.df_interesses = self._carregar_interesses(path_interesses)
-        print(f'⌛ Interesses carregados')
+        # Carregamento das bases
+        if estado is not None:
+            self.df_unidades = estado['df_unidades']
+            self.unidade_coord_dict = self._coordenadas_unidades(self.df_unidades)
+            self.df_cursos = estado['df_cursos']
+            self.df_interesses = estado['df_interesses']
+            self.df_ofertas = estado['df_ofertas']
+            self.df_trilhas = estado['df_trilhas']
+            logger.info('⌛ Bases carregadas do snapshot (%s)', self.path_snapshot)
+        else:
+            self._carregar_bases(path_interesses, path_ofertas, path_estrutura)
+            if self.path_snapshot:
+                self._salvar_snapshot(fontes)
+        
+        # O snapshot guarda os tipos originais; a compactação vale apenas para esta instância
+        if otimizar_memoria is None:
+            otimizar_memoria = os.getenv('OTIMIZAR_MEMORIA', '').lower() in ('1', 'true', 'sim')
+        self.otimizar_memoria = otimizar_memoria
+        if self.otimizar_memoria:
+            self._compactar_bases()
+        
+        # Vizinhança das unidades no match 2 (outras unidades)
+        if raio_km is None and os.getenv('RAIO_UNIDADES_KM'):
+            raio_km = float(os.getenv('RAIO_UNIDADES_KM'))
+        if k_unidades is None and os.getenv('K_UNIDADES'):
+            k_unidades = int(os.getenv('K_UNIDADES'))
+        self.raio_km = raio_km
+        self.k_unidades = k_unidades
+        
+        self._construir_matriz_distancias()
+        self._construir_indices_ofertas()
+        self._construir_adjacencia_trilhas()
+        self._construir_indice_interesses()
+        self._candidatas_examinadas = 0
+        
+        # Recomendações finais por (interesse, limite); invalidadas quando ofertas ou similares mudam
+        self.cache_resultados = CacheResultados(TAMANHO_CACHE_RESULTADOS, TTL_CACHE_RESULTADOS)
+        self.versao_dados = 0
+        
+        # Métricas de gerar_recomendacoes (última chamada e agregado)
+        self.ultimas_estatisticas = None
+        self.metricas = ColetorMetricas()
+        
+        # Modelo, embeddings e índices vetoriais são carregados no primeiro uso semântico
+        self.model = modelo if modelo is not None else ModeloEmbeddings(NOME_MODELO)
+        self._preparar_catalogo()
+        self._embeddings = None
+        self._embeddings_ead = None
+        self._embeddings_snapshot = estado['embeddings'] if estado is not None else None
+        self._indices_similaridade = None
+        self._indice_reverso = None
+        
+        # Índices vetoriais (geral e EAD)
+        self.tipo_indice = tipo_indice or os.getenv('INDICE_SIMILARIDADE', 'exato')
+        self.path_indices = path_indices or os.getenv('INDICE_DIR')
+        self.parametros_indice = parametros_indice or {}
+        
+        # Cursos fora do catálogo ativo são codificados sob demanda (com cache LRU)
+        self._encode_consulta = lru_cache(maxsize=TAMANHO_CACHE_CONSULTAS)(self._encode_texto)
+        
+        # Tabela de vizinhos pré-calculada (opcional)
+        self.path_similares = path_similares or os.getenv('SIMILARES_PATH')
+        self.tabela_similares = self._carregar_tabela_similares()
+        if self.tabela_similares is not None:
+            logger.info('⌛ Tabela de cursos similares carregada')
         
-        self.df_ofertas = self._carregar_ofertas(path_ofertas)
-        print(f'⌛ Ofertas carregadas')
+        t_total = time.time() - t1
+        logger.info('✅ Sistema inicializado em %.2f segundos\n', t_total)
+    
+    def _carregar_bases(self, path_interesses, path_ofertas, path_estrutura):
+        """Carrega e pré-processa as bases a partir dos arquivos de origem"""
+        # Todas as abas da estrutura em uma única leitura da planilha
+        planilhas = pd.read_excel(path_estrutura, sheet_name=ABAS_ESTRUTURA)
         
-        self.df_trilhas = self._carregar_trilhas_profissionais(path_estrutura)
-        print(f'⌛ Trilhas profissionais carregadas')
+        self.df_unidades, self.unidade_coord_dict = self._carregar_unidades(planilhas['UNIDADES'])
+        logger.info('⌛ Unidades carregadas')
         
-        # Modelo de embeddings
-        self.model = SentenceTransformer('paraphrase-multilingual-mpnet-base-v2')
-        print(f'⌛ Modelo de embeddings carregado')
+        self.df_cursos = self._carregar_cursos(planilhas['CATALOGO_CURSOS'])
+        logger.info('⌛ Cursos carregados')
         
-        # Pré-cálculo de embeddings
-        self._calcular_embeddings()
-        print(f'⌛ Embeddings calculados')
+        self.df_interesses = self._carregar_interesses(path_interesses)
+        logger.info('⌛ Interesses carregados')
         
-        t_total = time.time() - t1
-        print(f'✅ Sistema inicializado em {t_total:.2f} segundos\n')
+        self.df_ofertas = self._carregar_ofertas(path_ofertas)
+        logger.info('⌛ Ofertas carregadas')
+        
+        self.df_trilhas = self._carregar_trilhas_profissionais(planilhas['TRILHAS'])
+        logger.info('⌛ Trilhas profissionais carregadas')
     
-    def _carregar_cursos(self, path_estrutura):
+    def _salvar_snapshot(self, fontes):
+        """Grava o snapshot compilado das bases processadas e dos embeddings"""
+        try:
+            salvar_snapshot(
+                self.path_snapshot,
+                fontes,
+                {
+                    'df_unidades': self.df_unidades,
+                    'df_cursos': self.df_cursos,
+                    'df_interesses': self.df_interesses,
+                    'df_ofertas': self.df_ofertas,
+                    'df_trilhas': self.df_trilhas
+                },
+                nome_modelo=NOME_MODELO
+            )
+            logger.info('⌛ Snapshot gravado em %s', self.path_snapshot)
+        except Exception as e:
+            logger.warning('⚠️ Não foi possível gravar o snapshot: %s', e)
+    
+    def _compactar_bases(self):
+        """Converte as bases para tipos compactos e reporta a memória antes e depois"""
+        antes, depois = {}, {}
+        for nome in ['df_unidades', 'df_cursos', 'df_interesses', 'df_ofertas', 'df_trilhas']:
+            df = getattr(self, nome)
+            antes[nome] = memoria_mb(df)
+            df = compactar_dataframe(df, COLUNAS_CATEGORICAS.get(nome, ()))
+            setattr(self, nome, df)
+            depois[nome] = memoria_mb(df)
+        
+        relatorio_memoria(antes, depois)
+    
+    def _carregar_cursos(self, planilha_cursos):
         """Carrega o catálogo de cursos"""
-        df_cursos = pd.read_excel(path_estrutura, sheet_name='CATALOGO_CURSOS')
+        df_cursos = planilha_cursos
         return df_cursos
     
-    def _carregar_unidades(self, path_estrutura):
+    def _carregar_unidades(self, planilha_unidades):
         """Carrega informações das unidades/campi"""
-        df_unidades = pd.read_excel(path_estrutura, sheet_name='UNIDADES')
-        df_unidades = df_unidades[[
+        df_unidades = planilha_unidades[[
             'COD_UNIDADE',
             'NOME_UNIDADE',
             'LATITUDE',
             'LONGITUDE'
         ]]
         
-        # Dicionário de coordenadas para cálculo de distância
+        return df_unidades, self._coordenadas_unidades(df_unidades)
+    
+    @staticmethod
+    def _coordenadas_unidades(df_unidades):
+        """Dicionário de coordenadas para cálculo de distância"""
         unidades_list = df_unidades.to_dict('records')
-        unidade_coord_dict = {
+        return {
             x['COD_UNIDADE']: [x['LATITUDE'], x['LONGITUDE']] 
             for x in unidades_list
         }
+    
+    def _construir_matriz_distancias(self):
+        """Pré-calcula a matriz densa de distâncias (km) entre todas as unidades"""
+        codigos = list(self.unidade_coord_dict.keys())
+        coordenadas = np.array([self.unidade_coord_dict[cod] for cod in codigos], dtype=float).reshape(-1, 2)
+        
+        self.codigos_unidades = np.array(codigos, dtype=object)
+        self.posicao_unidade = {cod: i for i, cod in enumerate(codigos)}
+        self.matriz_distancias = haversine_vetorizado(
+            coordenadas[:, None, 0], coordenadas[:, None, 1],
+            coordenadas[None, :, 0], coordenadas[None, :, 1]
+        )
+        
+        # Outras unidades permitidas no match 2 para cada unidade (None = todas)
+        self.unidades_proximas = None
+        if self.raio_km is not None or self.k_unidades is not None:
+            self.unidades_proximas = np.zeros(self.matriz_distancias.shape, dtype=bool)
+            for posicao in range(len(codigos)):
+                self.unidades_proximas[posicao, self._vizinhos_unidade(posicao)] = True
+    
+    def _vizinhos_unidade(self, posicao, raio_km=None, k_unidades=None):
+        """
+        Posições das outras unidades em ordem de distância, limitadas pelo raio e pela
+        quantidade (padrão: configuração da instância). Empates mantêm a ordem das unidades.
+        """
+        raio_km = self.raio_km if raio_km is None else raio_km
+        k_unidades = self.k_unidades if k_unidades is None else k_unidades
+        
+        distancias = self.matriz_distancias[posicao]
+        ordem = np.argsort(distancias, kind='stable')
+        ordem = ordem[ordem != posicao]
+        
+        if raio_km is not None:
+            ordem = ordem[distancias[ordem] <= raio_km]
+        if k_unidades is not None:
+            ordem = ordem[:k_unidades]
+        
+        return ordem
+    
+    def _mascara_unidades_proximas(self, origens, destinos):
+        """Pares (unidade de interesse, unidade da oferta) dentro da vizinhança configurada"""
+        if self.unidades_proximas is None:
+            return np.ones(len(origens), dtype=bool)
+        
+        pos_origem = pd.Series(origens).map(self.posicao_unidade).to_numpy(dtype=float)
+        pos_destino = pd.Series(destinos).map(self.posicao_unidade).to_numpy(dtype=float)
+        
+        mascara = np.zeros(len(pos_origem), dtype=bool)
+        validos = ~(np.isnan(pos_origem) | np.isnan(pos_destino))
+        mascara[validos] = self.unidades_proximas[
+            pos_origem[validos].astype(np.int64), pos_destino[validos].astype(np.int64)
+        ]
+        
+        return mascara
+    
+    def _distancias_unidades(self, origens, destinos):
+        """Distâncias entre pares de unidades via matriz pré-calculada (NaN se sem coordenadas)"""
+        pos_origem = pd.Series(origens).map(self.posicao_unidade).to_numpy(dtype=float)
+        pos_destino = pd.Series(destinos).map(self.posicao_unidade).to_numpy(dtype=float)
+        
+        distancias = np.full(len(pos_origem), np.nan)
+        validos = ~(np.isnan(pos_origem) | np.isnan(pos_destino))
+        distancias[validos] = self.matriz_distancias[
+            pos_origem[validos].astype(np.int64), pos_destino[validos].astype(np.int64)
+        ]
         
-        return df_unidades, unidade_coord_dict
+        return distancias
     
-    def _carregar_trilhas_profissionais(self, path_estrutura):
+    def _carregar_trilhas_profissionais(self, planilha_trilhas):
         """Carrega mapeamento de cursos por trilha profissional"""
-        df_trilhas_full = pd.read_excel(path_estrutura, sheet_name='TRILHAS')
+        df_trilhas_full = planilha_trilhas
         
         # Processamento das trilhas
         colunas_cursos = [col for col in df_trilhas_full.columns if 'CURSO' in col]
@@ -144,6 +402,10 @@ class SistemaRecomendacaoCursos:
         # Normalização de valores
         df_interesses = df_interesses.replace({'S': True, 'N': False, 's': True, 'n': False})
         
+        # Dias e turnos compactados em uma única máscara de bits
+        df_interesses['MASCARA_AGENDA'] = self._mascara_agenda(df_interesses)
+        df_interesses = df_interesses.drop(columns=COLUNAS_DIAS + COLUNAS_TURNOS)
+        
         # Adiciona informações dos cursos
         df_interesses = df_interesses.merge(
             self.df_cursos[['COD_CURSO', 'TITULO', 'MODALIDADE', 'AREA_CONHECIMENTO']],
@@ -165,24 +427,40 @@ class SistemaRecomendacaoCursos:
             'TITULO': 'TITULO_INTERESSE',
             'MODALIDADE': 'MODALIDADE_INTERESSE',
             'AREA_CONHECIMENTO': 'AREA_INTERESSE',
-            'NOME_UNIDADE': 'UNIDADE_INTERESSE',
-            'TURNO_MANHA': 'TURNO_MANHA',
-            'TURNO_TARDE': 'TURNO_TARDE',
-            'TURNO_NOITE': 'TURNO_NOITE',
-            'DIA_SEG': 'DIA_SEG',
-            'DIA_TER': 'DIA_TER',
-            'DIA_QUA': 'DIA_QUA',
-            'DIA_QUI': 'DIA_QUI',
-            'DIA_SEX': 'DIA_SEX',
-            'DIA_SAB': 'DIA_SAB'
+            'NOME_UNIDADE': 'UNIDADE_INTERESSE'
         })
         
         return df_interesses
     
+    @staticmethod
+    def _mascara_agenda(df):
+        """Compacta as colunas booleanas de dias e turnos em uma máscara uint16"""
+        valores = (df[COLUNAS_DIAS + COLUNAS_TURNOS].to_numpy() == True).astype(np.uint16)
+        return valores @ PESOS_AGENDA
+    
+    @staticmethod
+    def _agenda_compativel(mascara_ofertas, mascara_interesse):
+        """
+        Compatibilidade de dias e de turnos entre ofertas e um interesse.
+        
+        Segue a regra original das máscaras de igualdade: há compatibilidade quando
+        ao menos um dia (ou turno) tem o mesmo valor nos dois lados.
+        
+        Returns:
+            Tupla (compatível em dias, compatível em turnos) de arrays booleanos
+        """
+        iguais = ~(np.asarray(mascara_ofertas, dtype=np.uint16) ^ np.asarray(mascara_interesse, dtype=np.uint16))
+        return (iguais & BITS_DIAS) != 0, (iguais & BITS_TURNOS) != 0
+    
     def _carregar_ofertas(self, path_ofertas):
         """Carrega base de ofertas de cursos"""
         df_ofertas = pd.read_csv(path_ofertas, encoding='latin1', sep=";")
-               
+        return self._preparar_ofertas(df_ofertas)
+    
+    def _preparar_ofertas(self, df_ofertas):
+        """Converte ofertas no layout do CSV para as colunas usadas nas estratégias"""
+        df_ofertas = df_ofertas.copy()
+        
         # Conversão de datas
         for col in ['DATA_CRIACAO', 'DATA_INICIO']:
             try:
@@ -193,8 +471,8 @@ class SistemaRecomendacaoCursos:
         # Filtro por ano
         df_ofertas = df_ofertas[df_ofertas['DATA_CRIACAO'].dt.year == 2025]
         
-        # Processamento de dias da semana
-        df_ofertas['DIAS_SEMANA'] = df_ofertas['DIAS_SEMANA'].str.replace(' ', '').str.split('-')
+        # Processamento de dias da semana (delimitadores nas pontas evitam a coluna de listas)
+        dias_semana = '-' + df_ofertas['DIAS_SEMANA'].str.replace(' ', '') + '-'
         
         dias_map = {
             'SEG': 'DIA_SEG',
@@ -206,13 +484,16 @@ class SistemaRecomendacaoCursos:
         }
         
         for sigla, coluna in dias_map.items():
-            df_ofertas[coluna] = df_ofertas['DIAS_SEMANA'].apply(lambda x: sigla in x if isinstance(x, list) else False)
+            df_ofertas[coluna] = dias_semana.str.contains(f'-{sigla}-', regex=False).fillna(False).astype(bool)
         
         # Processamento de turnos
         df_ofertas['TURNO_MANHA'] = df_ofertas['TURNO'].str.contains('DIURNO|INTEGRAL')
         df_ofertas['TURNO_TARDE'] = df_ofertas['TURNO'].str.contains('VESPERTINO|INTEGRAL')
         df_ofertas['TURNO_NOITE'] = df_ofertas['TURNO'].str.contains('NOTURNO|INTEGRAL')
         
+        # Dias e turnos compactados em uma única máscara de bits
+        df_ofertas['MASCARA_AGENDA'] = self._mascara_agenda(df_ofertas)
+        
         # Seleção final de colunas
         df_ofertas = df_ofertas[[
             'COD_OFERTA',
@@ -220,8 +501,7 @@ class SistemaRecomendacaoCursos:
             'COD_UNIDADE',
             'DATA_CRIACAO',
             'DATA_INICIO',
-            'DIA_SEG', 'DIA_TER', 'DIA_QUA', 'DIA_QUI', 'DIA_SEX', 'DIA_SAB',
-            'TURNO_MANHA', 'TURNO_TARDE', 'TURNO_NOITE'
+            'MASCARA_AGENDA'
         ]]
         
         # Adiciona informações do curso
@@ -241,8 +521,151 @@ class SistemaRecomendacaoCursos:
         
         return df_ofertas
     
-    def _calcular_embeddings(self):
-        """Calcula embeddings para todos os cursos ativos"""
+    def atualizar_ofertas(self, ofertas=None, remover=None):
+        """
+        Inclui, atualiza ou remove ofertas sem reconstruir o sistema.
+        
+        Ofertas são identificadas por COD_OFERTA: uma oferta já carregada é substituída
+        na mesma posição (mesmo desempate de ordenação de uma recarga completa) e as
+        demais são anexadas ao final. Os índices de ofertas são reconstruídos; embeddings
+        não são afetados, pois a similaridade é calculada sobre o catálogo de cursos.
+        
+        Args:
+            ofertas: Caminho de um CSV no layout da base de ofertas ou DataFrame com as
+                mesmas colunas. Ofertas que deixarem de passar nos filtros (ex.: ano de
+                criação) são removidas.
+            remover: Códigos de oferta a remover
+            
+        Returns:
+            Dicionário com as quantidades de ofertas incluídas, atualizadas e removidas
+        """
+        t1 = time.time()
+        
+        if isinstance(ofertas, str):
+            ofertas = pd.read_csv(ofertas, encoding='latin1', sep=";")
+        
+        atuais = self.df_ofertas
+        existentes = atuais['COD_OFERTA']
+        
+        # Códigos tocados: todos os recebidos (mesmo se descartados nos filtros) e os removidos
+        tocados = set(remover or [])
+        novas = atuais.iloc[:0]
+        if ofertas is not None and len(ofertas):
+            tocados.update(ofertas['COD_OFERTA'].tolist())
+            novas = self._preparar_ofertas(ofertas)
+        
+        mascara_tocadas = existentes.isin(tocados).to_numpy()
+        
+        # Chave de ordenação: posição atual; ofertas existentes mantêm a primeira posição do código
+        primeira_posicao = pd.Series(np.arange(len(atuais)), index=existentes.to_numpy())
+        primeira_posicao = primeira_posicao[~primeira_posicao.index.duplicated()]
+        chave_novas = novas['COD_OFERTA'].map(primeira_posicao).to_numpy(dtype=float, copy=True)
+        sem_posicao = np.isnan(chave_novas)
+        chave_novas[sem_posicao] = len(atuais) + np.arange(sem_posicao.sum())
+        
+        mantidas = atuais[~mascara_tocadas]
+        chaves = np.concatenate([np.flatnonzero(~mascara_tocadas), chave_novas])
+        ordem = np.argsort(chaves, kind='stable')
+        df_ofertas = pd.concat([mantidas, novas], ignore_index=True).iloc[ordem].reset_index(drop=True)
+        
+        codigos_tocados = set(existentes[mascara_tocadas].tolist())
+        codigos_novos = set(novas['COD_OFERTA'].tolist())
+        resumo = {
+            'incluidas': len(codigos_novos - codigos_tocados),
+            'atualizadas': len(codigos_novos & codigos_tocados),
+            'removidas': len(codigos_tocados - codigos_novos)
+        }
+        
+        if self.otimizar_memoria:
+            df_ofertas = compactar_dataframe(df_ofertas, COLUNAS_CATEGORICAS['df_ofertas'])
+        
+        self.df_ofertas = df_ofertas
+        self._construir_indices_ofertas()
+        self.limpar_cache_resultados()
+        
+        logger.info("⌛ Ofertas atualizadas em %.2f segundos: %d incluídas, %d atualizadas, %d removidas",
+                    time.time() - t1, resumo['incluidas'], resumo['atualizadas'], resumo['removidas'])
+        
+        return resumo
+    
+    def _construir_indices_ofertas(self):
+        """
+        Indexa as posições de df_ofertas por curso e por (curso, unidade),
+        para que as estratégias avaliem apenas as ofertas candidatas, e a posição
+        da primeira ocorrência de cada COD_OFERTA (consulta inversa).
+        """
+        self.indice_ofertas_curso = self.df_ofertas.groupby('COD_CURSO', sort=False).indices
+        self.indice_ofertas_curso_unidade = self.df_ofertas.groupby(['COD_CURSO', 'COD_UNIDADE'], sort=False).indices
+        
+        codigos = self.df_ofertas['COD_OFERTA']
+        primeiros = ~codigos.duplicated().to_numpy()
+        self.posicao_oferta = dict(zip(
+            codigos.to_numpy()[primeiros].tolist(),
+            np.flatnonzero(primeiros).tolist()
+        ))
+    
+    def _construir_adjacencia_trilhas(self):
+        """
+        Adjacência das trilhas profissionais: para cada curso, os outros cursos de todas
+        as trilhas em que ele aparece. A área associada a cada par é a da primeira trilha
+        do curso (na ordem da planilha) que contém os dois.
+        
+        Gera pares_trilha (DataFrame com _COD_CURSO_I, _COD_CURSO_TRILHA e
+        AREA_PROFISSIONAL, usado pelo lote e pelo índice inverso) e adjacencia_trilha
+        ({cod_curso: (códigos dos cursos vizinhos em ordem crescente, áreas)}).
+        """
+        trilhas = self.df_trilhas[['AREA_PROFISSIONAL', 'COD_CURSO']]
+        pares = trilhas.rename(columns={'COD_CURSO': '_COD_CURSO_I'}).merge(
+            trilhas.rename(columns={'COD_CURSO': '_COD_CURSO_TRILHA'}),
+            on='AREA_PROFISSIONAL'
+        )
+        pares = pares[pares['_COD_CURSO_TRILHA'] != pares['_COD_CURSO_I']]
+        pares = pares.drop_duplicates(['_COD_CURSO_I', '_COD_CURSO_TRILHA'])
+        self.pares_trilha = pares[['_COD_CURSO_I', '_COD_CURSO_TRILHA', 'AREA_PROFISSIONAL']].reset_index(drop=True)
+        
+        ordenados = self.pares_trilha.sort_values(['_COD_CURSO_I', '_COD_CURSO_TRILHA'], kind='stable')
+        cursos = ordenados['_COD_CURSO_TRILHA'].to_numpy()
+        areas = ordenados['AREA_PROFISSIONAL'].to_numpy(dtype=object)
+        self.adjacencia_trilha = {
+            cod: (cursos[grupo], areas[grupo])
+            for cod, grupo in ordenados.groupby('_COD_CURSO_I', sort=False).indices.items()
+        }
+    
+    def _construir_indice_interesses(self):
+        """Posição (em df_interesses) da primeira ocorrência de cada COD_INTERESSE e interesses por aluno"""
+        codigos = self.df_interesses['COD_INTERESSE']
+        primeiros = ~codigos.duplicated().to_numpy()
+        self.posicao_interesse = dict(zip(
+            codigos.to_numpy()[primeiros].tolist(),
+            np.flatnonzero(primeiros).tolist()
+        ))
+        
+        # Posições de todos os interesses de cada aluno
+        self.posicoes_aluno = self.df_interesses.groupby('COD_ALUNO', sort=False, observed=True).indices
+    
+    def _registro_interesse(self, posicao):
+        """Campos do interesse na posição informada, como dicionário repassado às estratégias"""
+        registro = {coluna: self.df_interesses[coluna].iat[posicao] for coluna in COLUNAS_REGISTRO_INTERESSE}
+        registro['DATA_INTERESSE'] = pd.to_datetime(registro['DATA_INTERESSE'])
+        return registro
+    
+    def limpar_cache_resultados(self):
+        """Descarta as recomendações em cache (chamado quando ofertas ou similares mudam)"""
+        self.versao_dados += 1
+        self.cache_resultados.limpar()
+    
+    def _ofertas_candidatas(self, indice, chaves):
+        """Ofertas das chaves informadas, na ordem original de df_ofertas"""
+        posicoes = [indice[chave] for chave in chaves if chave in indice]
+        self._candidatas_examinadas += sum(len(p) for p in posicoes)
+        
+        if not posicoes:
+            return self.df_ofertas.iloc[:0]
+        
+        return self.df_ofertas.iloc[np.sort(np.concatenate(posicoes))]
+    
+    def _preparar_catalogo(self):
+        """Seleciona os cursos ativos e os textos usados nos embeddings"""
         # Filtra cursos ativos
         df_cursos_emb = self.df_cursos.copy()
         df_cursos_emb = df_cursos_emb[
@@ -253,39 +676,253 @@ class SistemaRecomendacaoCursos:
         df_cursos_emb['AREA_TITULO'] = df_cursos_emb['AREA_CONHECIMENTO'] + " - " + df_cursos_emb['TITULO']
         
         # Separa cursos EAD
-        df_cursos_ead = df_cursos_emb[df_cursos_emb['MODALIDADE'].str.contains('EAD', na=False)]
-        ead_index = df_cursos_ead.index.to_numpy()
+        self.mascara_ead = df_cursos_emb['MODALIDADE'].str.contains('EAD', na=False).to_numpy()
         
         self.df_cursos_emb = df_cursos_emb.copy()
         self.lista_area_titulos = self.df_cursos_emb['AREA_TITULO'].tolist()
         
-        # Calcula embeddings
-        self.embeddings = self.model.encode(self.lista_area_titulos)
+        # Códigos alinhados posicionalmente com as linhas de self.embeddings
+        self.codigos_cursos = self.df_cursos_emb['COD_CURSO'].to_numpy()
+        
+        # Cópia intermediária descartada no modo de memória otimizada
+        if self.otimizar_memoria:
+            self.df_cursos_emb = None
         
-        # Salva embeddings para cursos EAD separadamente
-        self.lista_area_titulos_ead = np.array(self.lista_area_titulos)[ead_index].tolist()
-        self.embeddings_ead = self.embeddings[ead_index]
+        # Mapeia código do curso -> linha em self.embeddings
+        self.posicao_embedding_curso = {}
+        for posicao, cod in enumerate(self.codigos_cursos.tolist()):
+            self.posicao_embedding_curso.setdefault(cod, posicao)
+        
+        # Cursos EAD (máscara posicional sobre o catálogo ativo)
+        self.lista_area_titulos_ead = np.array(self.lista_area_titulos)[self.mascara_ead].tolist()
+        self.codigos_cursos_ead = self.codigos_cursos[self.mascara_ead]
     
-    def _calcular_distancia(self, lat1, lon1, lat2, lon2, raio_terra=6371):
-        """Calcula distância entre duas coordenadas usando fórmula de Haversine"""
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
+    @property
+    def embeddings(self):
+        """Embeddings dos cursos ativos, calculados no primeiro acesso"""
+        if self._embeddings is None:
+            self._embeddings = self._calcular_embeddings()
+            logger.info('⌛ Embeddings calculados')
+            
+            # Completa o snapshot, gravado antes de os embeddings existirem
+            if self.path_snapshot and self._embeddings_snapshot is None:
+                try:
+                    salvar_embeddings(self.path_snapshot, self._embeddings, NOME_MODELO)
+                    self._embeddings_snapshot = self._embeddings
+                except Exception as e:
+                    logger.warning('⚠️ Não foi possível gravar os embeddings no snapshot: %s', e)
+        return self._embeddings
+    
+    @property
+    def embeddings_ead(self):
+        if self._embeddings_ead is None:
+            self._embeddings_ead = self.embeddings[self.mascara_ead]
+        return self._embeddings_ead
+    
+    @property
+    def indices_similaridade(self):
+        """Índices vetoriais por partição, construídos no primeiro acesso"""
+        if self._indices_similaridade is None:
+            self._indices_similaridade = self._construir_indices_similaridade()
+            logger.info('⌛ Índices de similaridade (%s) prontos', self.tipo_indice)
+        return self._indices_similaridade
+    
+    def preparar_busca_semantica(self, cod_cursos=None):
+        """
+        Antecipa o carregamento dos embeddings e dos índices (ex.: em serviços).
+        
+        Com a tabela de similares, que tem linha para todos os cursos de df_cursos,
+        nada é carregado: embeddings, índices e modelo só são preparados se algum dos
+        cursos informados não estiver na tabela.
+        
+        Args:
+            cod_cursos: Cursos que serão consultados; os que não estão na tabela de
+                similares nem no catálogo ativo são codificados agora (cache de consultas)
+        
+        Returns:
+            Índices de similaridade por partição, ou None se não foram necessários
+        """
+        textos = []
+        if cod_cursos is not None:
+            cursos = self.df_cursos[self.df_cursos['COD_CURSO'].isin(cod_cursos)].drop_duplicates('COD_CURSO')
+            textos = [
+                area + ' - ' + titulo
+                for cod, area, titulo in zip(cursos['COD_CURSO'], cursos['AREA_CONHECIMENTO'], cursos['TITULO'])
+                if cod not in self.posicao_embedding_curso
+                and (self.tabela_similares is None or self.tabela_similares.vizinhos(cod, 1) is None)
+            ]
+        
+        if self.tabela_similares is not None and not textos:
+            return None
+        
+        indices = self.indices_similaridade
         
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
+        # Com cache persistente, os textos ausentes são codificados e gravados de uma só vez
+        if textos and self.cache_embeddings is not None:
+            self.cache_embeddings.obter(textos, self.model)
         
-        a = (math.sin(dlat / 2) ** 2) + \
-            (math.cos(lat1_rad) * math.cos(lat2_rad) * (math.sin(dlon / 2) ** 2))
+        for texto in textos:
+            self._encode_consulta(texto)
+        
+        return indices
+    
+    def _calcular_embeddings(self):
+        """Calcula embeddings para todos os cursos ativos"""
+        # Reaproveita o snapshot, se alinhado com o catálogo atual
+        embeddings = self._embeddings_snapshot
+        if embeddings is not None and len(embeddings) == len(self.lista_area_titulos):
+            return np.asarray(embeddings)
         
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        distancia_km = raio_terra * c
+        # Apenas textos novos ou alterados são codificados quando há cache
+        if self.cache_embeddings is not None:
+            return self.cache_embeddings.obter(self.lista_area_titulos, self.model)
         
-        return distancia_km
+        return self.model.encode(self.lista_area_titulos)
     
-    def _buscar_cursos_similares(self, cod_curso, top_n=3, apenas_ead=False):
-        """Busca cursos similares usando embeddings"""
+    def _construir_indices_similaridade(self):
+        """Carrega (ou constrói e persiste) um índice vetorial por partição do catálogo"""
+        particoes = {
+            'geral': (self.codigos_cursos, self.lista_area_titulos),
+            'ead': (self.codigos_cursos_ead, self.lista_area_titulos_ead)
+        }
+        
+        indices = {}
+        for particao, (codigos, textos) in particoes.items():
+            assinatura = assinatura_catalogo(codigos, textos, NOME_MODELO)
+            
+            path = None
+            if self.path_indices:
+                path = os.path.join(self.path_indices, f'indice_{particao}_{self.tipo_indice}.npz')
+            
+            indice = None
+            if path and os.path.exists(path):
+                indice = carregar_indice(path)
+                parametros_gravados = {nome: indice.parametros.get(nome) for nome in self.parametros_indice}
+                if (indice.tipo != self.tipo_indice or indice.assinatura != assinatura
+                        or parametros_gravados != self.parametros_indice):
+                    indice = None
+            
+            # Embeddings só são necessários se o índice precisar ser (re)construído
+            if indice is None:
+                vetores = self.embeddings if particao == 'geral' else self.embeddings_ead
+                indice = criar_indice(self.tipo_indice, **self.parametros_indice).construir(vetores, assinatura)
+                if path:
+                    os.makedirs(self.path_indices, exist_ok=True)
+                    indice.salvar(path)
+            
+            indices[particao] = indice
+        
+        return indices
+    
+    def _carregar_tabela_similares(self):
+        """Carrega a tabela de similares, ignorando-a se estiver desatualizada"""
+        if not self.path_similares or not os.path.exists(self.path_similares):
+            return None
+        
+        tabela = TabelaSimilares.carregar(self.path_similares)
+        
+        if not tabela.compativel(self.codigos_cursos, self.lista_area_titulos, NOME_MODELO,
+                                 consultas_extras=self._cursos_fora_catalogo()):
+            logger.warning('⚠️ Tabela de similares desatualizada (%s); usando busca por embeddings. '
+                           'Reconstrua com main_cli.py --construir-similares', self.path_similares)
+            return None
+        
+        return tabela
+    
+    def _cursos_fora_catalogo(self):
+        """Códigos e textos AREA_TITULO dos cursos de df_cursos que não estão no catálogo ativo"""
+        cursos = self.df_cursos.drop_duplicates('COD_CURSO')
+        cursos = cursos[~cursos['COD_CURSO'].isin(self.posicao_embedding_curso.keys())]
+        textos = (cursos['AREA_CONHECIMENTO'] + ' - ' + cursos['TITULO']).dropna()
+        
+        return cursos.loc[textos.index, 'COD_CURSO'].to_numpy(), textos.tolist()
+    
+    def construir_tabela_similares(self, k=K_PADRAO, path=None):
+        """
+        Calcula e grava a tabela de cursos similares (etapa offline).
+        
+        Todos os cursos de df_cursos recebem linha de vizinhos (os fora do catálogo ativo
+        apenas como consulta). Se já existir uma tabela no destino, apenas os cursos
+        novos, alterados ou afetados por alterações no catálogo são recalculados.
+        
+        Args:
+            k: Quantidade de vizinhos armazenados por curso
+            path: Arquivo .npz de destino (padrão: self.path_similares)
+            
+        Returns:
+            TabelaSimilares construída
+        """
+        path = path or self.path_similares
+        if not path:
+            raise ValueError('Informe o caminho da tabela de similares (SIMILARES_PATH)')
+        
+        anterior = TabelaSimilares.carregar(path) if os.path.exists(path) else None
+        
+        # Cursos fora do catálogo ativo também recebem linha (consultas de interesses)
+        codigos_extras, textos_extras = self._cursos_fora_catalogo()
+        if self.cache_embeddings is not None:
+            embeddings_extras = self.cache_embeddings.obter(textos_extras, self.model)
+        else:
+            embeddings_extras = self.model.encode(textos_extras) if textos_extras else np.empty((0, 0))
+        
+        tabela = TabelaSimilares.construir(
+            self.codigos_cursos,
+            self.lista_area_titulos,
+            self.embeddings,
+            self.mascara_ead,
+            NOME_MODELO,
+            k=k,
+            anterior=anterior,
+            consultas_extras=(codigos_extras, textos_extras, embeddings_extras)
+        )
+        tabela.salvar(path)
+        
+        self.path_similares = path
+        self.tabela_similares = tabela
+        self.limpar_cache_resultados()
+        if self._indice_reverso is not None:
+            self._indice_reverso['similares'] = {}
+        return tabela
+    
+    def _encode_texto(self, texto):
+        """
+        Calcula o embedding de um único texto (somente leitura, pois é cacheado).
+        Com cache persistente, o vetor é lido (ou gravado) nele pelo hash do texto.
+        """
+        if self.cache_embeddings is not None:
+            embedding = self.cache_embeddings.obter([texto], self.model)
+        else:
+            embedding = self.model.encode([texto])
+        embedding.flags.writeable = False
+        return embedding
+    
+    def _embedding_curso(self, cod_curso, area_titulo):
+        """Retorna o embedding do curso, reaproveitando o pré-cálculo do catálogo"""
+        posicao = self.posicao_embedding_curso.get(cod_curso)
+        
+        if posicao is not None:
+            # Com índice persistido, os vetores do catálogo já estão nele (mesmas posições)
+            indice = self.indices_similaridade['geral']
+            if self._embeddings is None:
+                return indice.vetores[posicao:posicao + 1]
+            return self.embeddings[posicao:posicao + 1]
+        
+        return self._encode_consulta(area_titulo)
+    
+    def _buscar_cursos_similares(self, cod_curso, top_n=3, apenas_ead=False, score_minimo=None):
+        """
+        Busca cursos similares usando a tabela pré-calculada ou embeddings.
+        
+        Com score_minimo, descarta (entre os top_n) os cursos com score menor ou igual,
+        evitando buscar ofertas que seriam removidas pelo filtro final.
+        """
+        if self.tabela_similares is not None:
+            similares_dict = self.tabela_similares.vizinhos(
+                cod_curso, top_n, particao='ead' if apenas_ead else 'geral'
+            )
+            if similares_dict is not None:
+                return self._filtrar_similares(similares_dict, score_minimo)
+        
         curso_info = self.df_cursos[self.df_cursos['COD_CURSO'] == cod_curso]
         
         if curso_info.empty:
@@ -295,72 +932,73 @@ class SistemaRecomendacaoCursos:
         area_curso = curso_info['AREA_CONHECIMENTO'].iloc[0]
         area_titulo = area_curso + ' - ' + titulo_curso
         
-        # Calcula embedding do curso alvo
-        embedding_alvo = self.model.encode([area_titulo])
+        # Embedding do curso alvo (pré-calculado ou codificado sob demanda)
+        embedding_alvo = self._embedding_curso(cod_curso, area_titulo)
         
-        # Escolhe base de embeddings
+        # Escolhe o índice (e códigos alinhados por posição)
         if apenas_ead:
-            embeddings_base = self.embeddings_ead
-            lista_base = self.lista_area_titulos_ead
+            indice = self.indices_similaridade['ead']
+            codigos_base = self.codigos_cursos_ead
         else:
-            embeddings_base = self.embeddings
-            lista_base = self.lista_area_titulos
+            indice = self.indices_similaridade['geral']
+            codigos_base = self.codigos_cursos
+        
+        if len(indice) == 0:
+            return [], {}
+        
+        # Busca um vizinho extra, pois o próprio curso normalmente está no índice
+        indices_similares, scores_similares = indice.buscar(embedding_alvo, top_n + 1)
+        indices_similares, scores_similares = indices_similares[0], scores_similares[0]
         
-        # Calcula similaridade
-        similaridades = cosine_similarity(embedding_alvo, embeddings_base)
-        indices_similares = np.argsort(similaridades[0])[::-1]
+        validos = indices_similares >= 0
+        indices_similares, scores_similares = indices_similares[validos], scores_similares[validos]
         
-        # Pega os top_n (excluindo o próprio curso)
-        nomes_similares = np.array(lista_base)[indices_similares[1:top_n+1]].tolist()
-        scores_similares = similaridades[0][indices_similares[1:top_n+1]].tolist()
+        # Mapeia para códigos de curso pela posição, excluindo o próprio curso
+        codigos_similares = codigos_base[indices_similares]
+        outros = codigos_similares != cod_curso
         
-        # Mapeia para códigos de curso
-        similares_dict = {}
-        for nome, score in zip(nomes_similares, scores_similares):
-            curso_match = self.df_cursos_emb[self.df_cursos_emb['AREA_TITULO'] == nome]
-            if not curso_match.empty:
-                cod = curso_match['COD_CURSO'].iloc[0]
-                similares_dict[cod] = score
+        similares_dict = dict(zip(
+            codigos_similares[outros][:top_n].tolist(),
+            scores_similares[outros][:top_n].tolist()
+        ))
         
+        return self._filtrar_similares(similares_dict, score_minimo)
+    
+    @staticmethod
+    def _filtrar_similares(similares_dict, score_minimo):
+        if score_minimo is not None:
+            similares_dict = {cod: score for cod, score in similares_dict.items() if score > score_minimo}
         return list(similares_dict.keys()), similares_dict
     
-    def _match_unidade_mesma(self, indice_interesse):
+    def _match_unidade_mesma(self, interesse):
         """Match 1: Mesmo curso na mesma unidade"""
-        dados_interesse = self.df_interesses.iloc[indice_interesse]
+        
+        # Candidatas: ofertas do curso na unidade (via índice)
+        ofertas = self._ofertas_candidatas(
+            self.indice_ofertas_curso_unidade,
+            [(interesse['COD_CURSO'], interesse['COD_UNIDADE'])]
+        )
         
         # Filtros básicos
-        mask_curso = self.df_ofertas['COD_CURSO'] == dados_interesse['COD_CURSO']
-        mask_unidade = self.df_ofertas['COD_UNIDADE'] == dados_interesse['COD_UNIDADE']
-        mask_data = self.df_ofertas['DATA_CRIACAO'] >= pd.to_datetime(dados_interesse['DATA_INTERESSE'])
+        mask_data = ofertas['DATA_CRIACAO'] >= interesse['DATA_INTERESSE']
         
         # Match completo (curso + unidade + dias + turnos)
-        mask_dias = (
-            (self.df_ofertas['DIA_SEG'] == dados_interesse['DIA_SEG']) |
-            (self.df_ofertas['DIA_TER'] == dados_interesse['DIA_TER']) |
-            (self.df_ofertas['DIA_QUA'] == dados_interesse['DIA_QUA']) |
-            (self.df_ofertas['DIA_QUI'] == dados_interesse['DIA_QUI']) |
-            (self.df_ofertas['DIA_SEX'] == dados_interesse['DIA_SEX']) |
-            (self.df_ofertas['DIA_SAB'] == dados_interesse['DIA_SAB'])
-        )
-        
-        mask_turnos = (
-            (self.df_ofertas['TURNO_MANHA'] == dados_interesse['TURNO_MANHA']) |
-            (self.df_ofertas['TURNO_TARDE'] == dados_interesse['TURNO_TARDE']) |
-            (self.df_ofertas['TURNO_NOITE'] == dados_interesse['TURNO_NOITE'])
+        mask_dias, mask_turnos = self._agenda_compativel(
+            ofertas['MASCARA_AGENDA'].to_numpy(), interesse['MASCARA_AGENDA']
         )
         
         # Resultados hierárquicos
         resultados = []
         
         # Nível 1: Match completo
-        match_completo = self.df_ofertas[mask_curso & mask_unidade & mask_dias & mask_turnos & mask_data].copy()
+        match_completo = ofertas[mask_dias & mask_turnos & mask_data].copy()
         if not match_completo.empty:
             match_completo['TIPO_INDICACAO'] = '1.MATCH_COMPLETO'
             match_completo['NIVEL_MATCH'] = 'CURSO+UNIDADE+DIAS+TURNOS'
             resultados.append(match_completo)
         
         # Nível 2: Sem turnos
-        match_sem_turno = self.df_ofertas[mask_curso & mask_unidade & mask_dias & mask_data].copy()
+        match_sem_turno = ofertas[mask_dias & mask_data].copy()
         match_sem_turno = match_sem_turno[~match_sem_turno['COD_OFERTA'].isin(match_completo['COD_OFERTA'])]
         if not match_sem_turno.empty:
             match_sem_turno['TIPO_INDICACAO'] = '1.MATCH_COMPLETO'
@@ -368,7 +1006,7 @@ class SistemaRecomendacaoCursos:
             resultados.append(match_sem_turno)
         
         # Nível 3: Apenas curso + unidade
-        match_basico = self.df_ofertas[mask_curso & mask_unidade & mask_data].copy()
+        match_basico = ofertas[mask_data].copy()
         ofertas_ja_incluidas = match_completo['COD_OFERTA'].tolist() + match_sem_turno['COD_OFERTA'].tolist()
         match_basico = match_basico[~match_basico['COD_OFERTA'].isin(ofertas_ja_incluidas)]
         if not match_basico.empty:
@@ -378,52 +1016,50 @@ class SistemaRecomendacaoCursos:
         
         return pd.concat(resultados) if resultados else pd.DataFrame()
     
-    def _match_unidade_outra(self, indice_interesse):
-        """Match 2: Mesmo curso em outras unidades"""
-        dados_interesse = self.df_interesses.iloc[indice_interesse]
+    def _match_unidade_outra(self, interesse, raio_km=None, k_unidades=None):
+        """
+        Match 2: Mesmo curso em outras unidades
         
-        # Coordenadas da unidade de interesse
-        cod_unidade_interesse = dados_interesse['COD_UNIDADE']
-        lat_lon = self.unidade_coord_dict.get(cod_unidade_interesse, [None, None])
+        Com raio_km e/ou k_unidades (padrão: configuração da instância), apenas as ofertas
+        das unidades vizinhas são examinadas; ofertas em unidades sem coordenadas ficam de fora.
+        """
         
-        if None in lat_lon:
+        # Unidade de interesse precisa ter coordenadas para o cálculo de distância
+        cod_unidade_interesse = interesse['COD_UNIDADE']
+        if cod_unidade_interesse not in self.posicao_unidade:
             return pd.DataFrame()
         
-        lat_interesse, lon_interesse = lat_lon
+        # Candidatas: ofertas do curso (via índice), fora da unidade de interesse
+        if raio_km is None and k_unidades is None and self.unidades_proximas is None:
+            ofertas = self._ofertas_candidatas(self.indice_ofertas_curso, [interesse['COD_CURSO']])
+        else:
+            vizinhos = self._vizinhos_unidade(self.posicao_unidade[cod_unidade_interesse], raio_km, k_unidades)
+            ofertas = self._ofertas_candidatas(
+                self.indice_ofertas_curso_unidade,
+                [(interesse['COD_CURSO'], cod) for cod in self.codigos_unidades[vizinhos]]
+            )
         
         # Filtros
-        mask_curso = self.df_ofertas['COD_CURSO'] == dados_interesse['COD_CURSO']
-        mask_unidade = self.df_ofertas['COD_UNIDADE'] != cod_unidade_interesse
-        mask_data = self.df_ofertas['DATA_CRIACAO'] >= pd.to_datetime(dados_interesse['DATA_INTERESSE'])
+        mask_unidade = ofertas['COD_UNIDADE'] != cod_unidade_interesse
+        mask_data = ofertas['DATA_CRIACAO'] >= interesse['DATA_INTERESSE']
         
         # Match hierárquico
         resultados = []
         
         # Com dias e turnos
-        mask_dias = (
-            (self.df_ofertas['DIA_SEG'] == dados_interesse['DIA_SEG']) |
-            (self.df_ofertas['DIA_TER'] == dados_interesse['DIA_TER']) |
-            (self.df_ofertas['DIA_QUA'] == dados_interesse['DIA_QUA']) |
-            (self.df_ofertas['DIA_QUI'] == dados_interesse['DIA_QUI']) |
-            (self.df_ofertas['DIA_SEX'] == dados_interesse['DIA_SEX']) |
-            (self.df_ofertas['DIA_SAB'] == dados_interesse['DIA_SAB'])
-        )
-        
-        mask_turnos = (
-            (self.df_ofertas['TURNO_MANHA'] == dados_interesse['TURNO_MANHA']) |
-            (self.df_ofertas['TURNO_TARDE'] == dados_interesse['TURNO_TARDE']) |
-            (self.df_ofertas['TURNO_NOITE'] == dados_interesse['TURNO_NOITE'])
+        mask_dias, mask_turnos = self._agenda_compativel(
+            ofertas['MASCARA_AGENDA'].to_numpy(), interesse['MASCARA_AGENDA']
         )
         
         # Nível 1: Com dias e turnos
-        match_completo = self.df_ofertas[mask_curso & mask_unidade & mask_dias & mask_turnos & mask_data].copy()
+        match_completo = ofertas[mask_unidade & mask_dias & mask_turnos & mask_data].copy()
         if not match_completo.empty:
             match_completo['TIPO_INDICACAO'] = '2.OUTRA_UNIDADE'
             match_completo['NIVEL_MATCH'] = 'CURSO+DIAS+TURNOS'
             resultados.append(match_completo)
         
         # Nível 2: Apenas dias
-        match_dias = self.df_ofertas[mask_curso & mask_unidade & mask_dias & mask_data].copy()
+        match_dias = ofertas[mask_unidade & mask_dias & mask_data].copy()
         match_dias = match_dias[~match_dias['COD_OFERTA'].isin(match_completo['COD_OFERTA'])]
         if not match_dias.empty:
             match_dias['TIPO_INDICACAO'] = '2.OUTRA_UNIDADE'
@@ -431,7 +1067,7 @@ class SistemaRecomendacaoCursos:
             resultados.append(match_dias)
         
         # Nível 3: Apenas curso
-        match_curso = self.df_ofertas[mask_curso & mask_unidade & mask_data].copy()
+        match_curso = ofertas[mask_unidade & mask_data].copy()
         ofertas_ja_incluidas = match_completo['COD_OFERTA'].tolist() + match_dias['COD_OFERTA'].tolist()
         match_curso = match_curso[~match_curso['COD_OFERTA'].isin(ofertas_ja_incluidas)]
         if not match_curso.empty:
@@ -449,71 +1085,62 @@ class SistemaRecomendacaoCursos:
                 how='left'
             )
             
-            resultados_df['DISTANCIA_KM'] = resultados_df.apply(
-                lambda row: self._calcular_distancia(
-                    lat_interesse, lon_interesse,
-                    row['LATITUDE'], row['LONGITUDE']
-                ),
-                axis=1
+            resultados_df['DISTANCIA_KM'] = self._distancias_unidades(
+                np.full(len(resultados_df), cod_unidade_interesse, dtype=object),
+                resultados_df['COD_UNIDADE'].to_numpy()
             )
             
             return resultados_df
         
         return pd.DataFrame()
     
-    def _match_trilha_profissional(self, indice_interesse):
-        """Match 3: Cursos da mesma trilha profissional"""
-        dados_interesse = self.df_interesses.iloc[indice_interesse]
-        cod_curso_interesse = dados_interesse['COD_CURSO']
+    def _match_trilha_profissional(self, interesse):
+        """Match 3: Cursos das trilhas profissionais do curso de interesse"""
         
-        # Encontra trilha do curso
-        trilha_curso = self.df_trilhas[self.df_trilhas['COD_CURSO'] == cod_curso_interesse]
+        # Outros cursos de todas as trilhas do curso (adjacência pré-calculada)
+        vizinhos = self.adjacencia_trilha.get(interesse['COD_CURSO'])
         
-        if trilha_curso.empty:
+        if vizinhos is None:
             return pd.DataFrame()
         
-        area_profissional = trilha_curso['AREA_PROFISSIONAL'].iloc[0]
-        
-        # Busca outros cursos da mesma trilha
-        cursos_trilha = self.df_trilhas[
-            (self.df_trilhas['AREA_PROFISSIONAL'] == area_profissional) &
-            (self.df_trilhas['COD_CURSO'] != cod_curso_interesse)
-        ]['COD_CURSO'].tolist()
-        
-        if not cursos_trilha:
-            return pd.DataFrame()
+        cursos_trilha, areas = vizinhos
         
-        # Busca ofertas desses cursos
-        mask_cursos = self.df_ofertas['COD_CURSO'].isin(cursos_trilha)
-        mask_unidade = self.df_ofertas['COD_UNIDADE'] == dados_interesse['COD_UNIDADE']
-        mask_data = self.df_ofertas['DATA_CRIACAO'] >= pd.to_datetime(dados_interesse['DATA_INTERESSE'])
+        # Busca ofertas desses cursos na unidade de interesse (via índice)
+        ofertas = self._ofertas_candidatas(
+            self.indice_ofertas_curso_unidade,
+            [(cod, interesse['COD_UNIDADE']) for cod in cursos_trilha.tolist()]
+        )
+        mask_data = ofertas['DATA_CRIACAO'] >= interesse['DATA_INTERESSE']
         
-        resultados = self.df_ofertas[mask_cursos & mask_unidade & mask_data].copy()
+        resultados = ofertas[mask_data].copy()
         
         if not resultados.empty:
             resultados['TIPO_INDICACAO'] = '3.TRILHA_PROFISSIONAL'
             resultados['NIVEL_MATCH'] = 'AREA_PROFISSIONAL+MESMA_UNIDADE'
-            resultados['AREA_PROFISSIONAL'] = area_profissional
+            resultados['AREA_PROFISSIONAL'] = areas[np.searchsorted(cursos_trilha, resultados['COD_CURSO'].to_numpy())]
         
         return resultados
     
-    def _match_similaridade_semantica(self, indice_interesse):
+    def _match_similaridade_semantica(self, interesse):
         """Match 4: Cursos com títulos semanticamente similares"""
-        dados_interesse = self.df_interesses.iloc[indice_interesse]
-        cod_curso_interesse = dados_interesse['COD_CURSO']
+        cod_curso_interesse = interesse['COD_CURSO']
         
         # Busca cursos similares
-        cursos_similares, scores = self._buscar_cursos_similares(cod_curso_interesse, top_n=5)
+        cursos_similares, scores = self._buscar_cursos_similares(
+            cod_curso_interesse, top_n=5, score_minimo=LIMIAR_SIMILARIDADE
+        )
         
         if not cursos_similares:
             return pd.DataFrame()
         
-        # Busca ofertas desses cursos similares
-        mask_cursos = self.df_ofertas['COD_CURSO'].isin(cursos_similares)
-        mask_unidade = self.df_ofertas['COD_UNIDADE'] == dados_interesse['COD_UNIDADE']
-        mask_data = self.df_ofertas['DATA_CRIACAO'] >= pd.to_datetime(dados_interesse['DATA_INTERESSE'])
+        # Busca ofertas desses cursos similares na unidade de interesse (via índice)
+        ofertas = self._ofertas_candidatas(
+            self.indice_ofertas_curso_unidade,
+            [(cod, interesse['COD_UNIDADE']) for cod in cursos_similares]
+        )
+        mask_data = ofertas['DATA_CRIACAO'] >= interesse['DATA_INTERESSE']
         
-        resultados = self.df_ofertas[mask_cursos & mask_unidade & mask_data].copy()
+        resultados = ofertas[mask_data].copy()
         
         if not resultados.empty:
             resultados['TIPO_INDICACAO'] = '4.SIMILARIDADE_SEMANTICA'
@@ -526,25 +1153,24 @@ class SistemaRecomendacaoCursos:
         
         return resultados
     
-    def _match_ead(self, indice_interesse):
+    def _match_ead(self, interesse):
         """Match 5: Cursos EAD similares"""
-        dados_interesse = self.df_interesses.iloc[indice_interesse]
-        cod_curso_interesse = dados_interesse['COD_CURSO']
+        cod_curso_interesse = interesse['COD_CURSO']
         
         # Busca cursos EAD similares
         cursos_ead_similares, scores = self._buscar_cursos_similares(
-            cod_curso_interesse, top_n=5, apenas_ead=True
+            cod_curso_interesse, top_n=5, apenas_ead=True, score_minimo=LIMIAR_SIMILARIDADE
         )
         
         if not cursos_ead_similares:
             return pd.DataFrame()
         
-        # Busca ofertas EAD desses cursos
-        mask_cursos = self.df_ofertas['COD_CURSO'].isin(cursos_ead_similares)
-        mask_ead = self.df_ofertas['MODALIDADE_OFERTA'].str.contains('EAD', na=False)
-        mask_data = self.df_ofertas['DATA_CRIACAO'] >= pd.to_datetime(dados_interesse['DATA_INTERESSE'])
+        # Busca ofertas EAD desses cursos (via índice)
+        ofertas = self._ofertas_candidatas(self.indice_ofertas_curso, cursos_ead_similares)
+        mask_ead = ofertas['MODALIDADE_OFERTA'].str.contains('EAD', na=False)
+        mask_data = ofertas['DATA_CRIACAO'] >= interesse['DATA_INTERESSE']
         
-        resultados = self.df_ofertas[mask_cursos & mask_ead & mask_data].copy()
+        resultados = ofertas[mask_ead & mask_data].copy()
         
         if not resultados.empty:
             resultados['TIPO_INDICACAO'] = '5.MODALIDADE_EAD'
@@ -555,126 +1181,648 @@ class SistemaRecomendacaoCursos:
         
         return resultados
     
-    def gerar_recomendacoes(self, cod_interesse):
+    def gerar_recomendacoes(self, cod_interesse, limite=None, verbose=False, retornar_estatisticas=False):
         """
         Gera recomendações para um interesse específico.
         
         Args:
             cod_interesse: Código do registro de interesse
+            limite: Quantidade máxima de recomendações (padrão: todas). Como a prioridade
+                segue a ordem das estratégias, as seguintes deixam de ser avaliadas assim
+                que as anteriores somam `limite` resultados
+            verbose: Se True, registra o andamento de cada estratégia em nível INFO (senão, DEBUG)
+            retornar_estatisticas: Se True, retorna também as métricas da chamada
             
         Returns:
-            DataFrame com todas as recomendações ordenadas por prioridade
+            DataFrame com as recomendações ordenadas por prioridade (None se não
+            houver) ou, com retornar_estatisticas, a tupla (recomendações, EstatisticasRecomendacao).
+            As métricas da última chamada ficam em `ultimas_estatisticas` e o agregado em `metricas`.
+            Resultados repetidos vêm do cache (`cache_resultados`); o DataFrame retornado é uma cópia.
         """
-        # Encontra o índice do interesse
-        interesse_idx = self.df_interesses[
-            self.df_interesses['COD_INTERESSE'] == cod_interesse
-        ].index
+        t_inicio = time.perf_counter()
+        estatisticas = EstatisticasRecomendacao(cod_interesse)
         
-        if len(interesse_idx) == 0:
-            print(f"⚠️ Nenhum interesse encontrado com código {cod_interesse}")
-            return None
+        # Encontra a posição do interesse (índice por código)
+        posicao = self.posicao_interesse.get(cod_interesse)
         
-        idx = interesse_idx[0]
-        dados_interesse = self.df_interesses.iloc[idx]
+        if posicao is None:
+            logger.warning("⚠️ Nenhum interesse encontrado com código %s", cod_interesse)
+            return (None, estatisticas) if retornar_estatisticas else None
         
-        print(f"\n🔍 Gerando recomendações para:")
-        print(f"   Aluno: {dados_interesse['COD_ALUNO']}")
-        print(f"   Curso: {dados_interesse['TITULO_INTERESSE']}")
-        print(f"   Unidade: {dados_interesse['UNIDADE_INTERESSE']}")
+        # Andamento em INFO com verbose; caso contrário em DEBUG (não formatado se desabilitado)
+        nivel = logging.INFO if verbose else logging.DEBUG
+        
+        em_cache = self.cache_resultados.obter((cod_interesse, limite), _AUSENTE)
+        if em_cache is not _AUSENTE:
+            logger.log(nivel, "♻️  Recomendações do interesse %s obtidas do cache", cod_interesse)
+            return self._finalizar_estatisticas(
+                None if em_cache is None else em_cache.copy(),
+                estatisticas, t_inicio, retornar_estatisticas, cache=True
+            )
+        
+        dados_interesse = self._registro_interesse(posicao)
+        if logger.isEnabledFor(nivel):
+            logger.log(nivel, "\n🔍 Gerando recomendações para:")
+            logger.log(nivel, "   Aluno: %s", dados_interesse['COD_ALUNO'])
+            logger.log(nivel, "   Curso: %s", dados_interesse['TITULO_INTERESSE'])
+            logger.log(nivel, "   Unidade: %s", dados_interesse['UNIDADE_INTERESSE'])
+            logger.log(nivel, "\n📊 Executando estratégias de matching...")
+        
+        # Executa todas as estratégias de matching, medindo tempo e ofertas candidatas de cada uma
+        estrategias = [
+            ('unidade_mesma', '1. Mesmo curso na mesma unidade', self._match_unidade_mesma),
+            ('unidade_outra', '2. Mesmo curso em outras unidades', self._match_unidade_outra),
+            ('trilha_profissional', '3. Cursos da mesma trilha profissional', self._match_trilha_profissional),
+            ('similaridade_semantica', '4. Cursos com títulos similares', self._match_similaridade_semantica),
+            ('ead', '5. Cursos EAD similares', self._match_ead)
+        ]
         
-        # Executa todas as estratégias de matching
         resultados = []
+        encontrados = 0
+        for etapa, descricao, estrategia in estrategias:
+            if limite is not None and encontrados >= limite:
+                estatisticas.ignorar(etapa)
+                logger.log(nivel, "   %s... ⏭️  ignorada (limite de %d atingido)", descricao, limite)
+                continue
+            
+            logger.log(nivel, "   %s...", descricao)
+            
+            self._candidatas_examinadas = 0
+            t1 = time.perf_counter()
+            match = estrategia(dados_interesse)
+            estatisticas.registrar(etapa, time.perf_counter() - t1, self._candidatas_examinadas, len(match))
+            
+            resultados.append(match)
+            encontrados += len(match)
+            logger.log(nivel, "      ✅ Encontrados: %d", len(match))
         
-        print("\n📊 Executando estratégias de matching...")
-        
-        # 1. Mesma unidade
-        print("   1. Mesmo curso na mesma unidade...")
-        match1 = self._match_unidade_mesma(idx)
-        resultados.append(match1)
-        print(f"      ✅ Encontrados: {len(match1)}")
-        
-        # 2. Outras unidades
-        print("   2. Mesmo curso em outras unidades...")
-        match2 = self._match_unidade_outra(idx)
-        resultados.append(match2)
-        print(f"      ✅ Encontrados: {len(match2)}")
-        
-        # 3. Trilha profissional
-        print("   3. Cursos da mesma trilha profissional...")
-        match3 = self._match_trilha_profissional(idx)
-        resultados.append(match3)
-        print(f"      ✅ Encontrados: {len(match3)}")
-        
-        # 4. Similaridade semântica
-        print("   4. Cursos com títulos similares...")
-        match4 = self._match_similaridade_semantica(idx)
-        resultados.append(match4)
-        print(f"      ✅ Encontrados: {len(match4)}")
-        
-        # 5. EAD
-        print("   5. Cursos EAD similares...")
-        match5 = self._match_ead(idx)
-        resultados.append(match5)
-        print(f"      ✅ Encontrados: {len(match5)}")
-        
-        # Combina todos os resultados
-        todos_resultados = pd.concat([r for r in resultados if not r.empty], ignore_index=True)
+        # Consolidação: concatena e ordena (o limiar de similaridade já é aplicado na busca)
+        t1 = time.perf_counter()
+        nao_vazios = [r for r in resultados if not r.empty]
+        todos_resultados = pd.concat(nao_vazios, ignore_index=True) if nao_vazios else pd.DataFrame()
+        candidatas = len(todos_resultados)
         
         if todos_resultados.empty:
-            print("\n🚫 Nenhuma recomendação encontrada")
+            logger.log(nivel, "\n🚫 Nenhuma recomendação encontrada")
+            todos_resultados = None
+        else:
+            # Adiciona informações do interesse
+            todos_resultados['COD_ALUNO'] = dados_interesse['COD_ALUNO']
+            todos_resultados['CURSO_INTERESSE'] = dados_interesse['TITULO_INTERESSE']
+            todos_resultados['UNIDADE_INTERESSE'] = dados_interesse['UNIDADE_INTERESSE']
+            todos_resultados['AREA_INTERESSE'] = dados_interesse['AREA_INTERESSE']
+            todos_resultados['MODALIDADE_INTERESSE'] = dados_interesse['MODALIDADE_INTERESSE']
+            
+            # Ordenação por prioridade
+            todos_resultados['PRIORIDADE'] = todos_resultados['TIPO_INDICACAO'].map(ORDEM_PRIORIDADE)
+            
+            # Ordena por prioridade, distância e score (colunas ausentes são ignoradas)
+            if 'DISTANCIA_KM' in todos_resultados.columns:
+                todos_resultados['DISTANCIA_KM'] = todos_resultados['DISTANCIA_KM'].fillna(0)
+            todos_resultados = self._ordenar_recomendacoes(todos_resultados, limite)
+            
+            logger.log(nivel, "\n✅ Total de recomendações geradas: %d", len(todos_resultados))
+        
+        estatisticas.registrar(
+            'consolidacao', time.perf_counter() - t1, candidatas,
+            0 if todos_resultados is None else len(todos_resultados)
+        )
+        
+        self.cache_resultados.guardar((cod_interesse, limite), todos_resultados)
+        
+        return self._finalizar_estatisticas(
+            None if todos_resultados is None else todos_resultados.copy(),
+            estatisticas, t_inicio, retornar_estatisticas
+        )
+    
+    def _finalizar_estatisticas(self, recomendacoes, estatisticas, t_inicio, retornar_estatisticas, cache=False):
+        """Registra as métricas da chamada e monta o retorno de gerar_recomendacoes"""
+        estatisticas.cache = cache
+        estatisticas.tempo_total = time.perf_counter() - t_inicio
+        
+        self.ultimas_estatisticas = estatisticas
+        self.metricas.registrar(estatisticas)
+        registrar_log(estatisticas)
+        
+        if retornar_estatisticas:
+            return recomendacoes, estatisticas
+        return recomendacoes
+    
+    @staticmethod
+    def _ordenar_recomendacoes(recomendacoes, limite=None):
+        """
+        Ordena por PRIORIDADE, DISTANCIA_KM e SCORE_SIMILARIDADE (decrescente, vazios por último).
+        
+        Com limite, seleciona apenas as `limite` primeiras (nsmallest) em vez de ordenar tudo.
+        """
+        chaves = pd.DataFrame({'PRIORIDADE': recomendacoes['PRIORIDADE']})
+        if 'DISTANCIA_KM' in recomendacoes.columns:
+            chaves['DISTANCIA_KM'] = recomendacoes['DISTANCIA_KM']
+        if 'SCORE_SIMILARIDADE' in recomendacoes.columns:
+            chaves['SCORE_INVERSO'] = (-recomendacoes['SCORE_SIMILARIDADE']).fillna(np.inf)
+        
+        if limite is None:
+            ordem = chaves.sort_values(list(chaves.columns), kind='mergesort').index
+        else:
+            ordem = chaves.nsmallest(limite, list(chaves.columns)).index
+        
+        return recomendacoes.loc[ordem]
+    
+    def gerar_recomendacoes_lote(self, cod_interesses):
+        """
+        Gera recomendações para vários interesses em uma única passada vetorizada.
+        
+        Aplica as mesmas estratégias de `gerar_recomendacoes` (mesmos valores de
+        TIPO_INDICACAO, NIVEL_MATCH, distância, score e ordenação), mas cruzando
+        todos os interesses com as ofertas por junções em vez de máscaras por interesse.
+        Buscas de similaridade são feitas uma vez por curso distinto.
+        
+        Args:
+            cod_interesses: Lista de códigos de interesse
+            
+        Returns:
+            DataFrame com as recomendações de todos os interesses (coluna COD_INTERESSE),
+            na ordem recebida e ordenadas por prioridade dentro de cada interesse.
+            Vazio se nenhuma recomendação for encontrada.
+        """
+        base_int = self._lote_interesses(self.filtrar_interesses_conhecidos(cod_interesses))
+        if base_int.empty:
+            return pd.DataFrame()
+        
+        base_of = self._lote_ofertas()
+        
+        pares = [
+            *self._lote_mesmo_curso(base_int, base_of),
+            self._lote_trilha_profissional(base_int, base_of),
+            self._lote_similaridade(base_int, base_of, apenas_ead=False),
+            self._lote_similaridade(base_int, base_of, apenas_ead=True)
+        ]
+        pares = [p for p in pares if not p.empty]
+        
+        if not pares:
+            return pd.DataFrame()
+        
+        pares = pd.concat(pares, ignore_index=True)
+        
+        # Filtra similaridades altas (mantém recomendações não baseadas em similaridade)
+        pares = pares[
+            pares['SCORE_SIMILARIDADE'].isna() | (pares['SCORE_SIMILARIDADE'] > LIMIAR_SIMILARIDADE)
+        ]
+        
+        # Mesma ordenação de gerar_recomendacoes, agrupada por interesse
+        pares['PRIORIDADE'] = pares['TIPO_INDICACAO'].map(ORDEM_PRIORIDADE)
+        pares['DISTANCIA_KM'] = pares['DISTANCIA_KM'].fillna(0)
+        ordem = np.lexsort((
+            pares['_POS_OFERTA'].to_numpy(),
+            pares['_ORDEM_NIVEL'].to_numpy(),
+            (-pares['SCORE_SIMILARIDADE']).fillna(np.inf).to_numpy(),
+            pares['DISTANCIA_KM'].to_numpy(),
+            pares['PRIORIDADE'].to_numpy(),
+            pares['_ORDEM_INTERESSE'].to_numpy()
+        ))
+        pares = pares.iloc[ordem].reset_index(drop=True)
+        
+        return self._lote_montar_resultado(pares, base_int)
+    
+    def gerar_recomendacoes_aluno(self, cod_aluno, limite=None):
+        """
+        Recomendações consolidadas de todos os interesses de um aluno.
+        
+        Os interesses são avaliados em uma única passada em lote (buscas de similaridade
+        compartilhadas entre interesses do mesmo curso) e cada oferta aparece uma vez,
+        com a melhor prioridade entre os interesses.
+        
+        Args:
+            cod_aluno: Código do aluno
+            limite: Quantidade máxima de recomendações (padrão: todas)
+            
+        Returns:
+            DataFrame ordenado por prioridade, com COD_INTERESSE (interesse que gerou a
+            melhor indicação) e QTD_INTERESSES (interesses do aluno que indicaram a oferta),
+            ou None se o aluno não tiver recomendações
+        """
+        chave = ('aluno', cod_aluno, limite)
+        em_cache = self.cache_resultados.obter(chave, _AUSENTE)
+        if em_cache is not _AUSENTE:
+            return None if em_cache is None else em_cache.copy()
+        
+        if cod_aluno not in self.posicoes_aluno:
+            logger.warning("⚠️ Nenhum interesse encontrado para o aluno %s", cod_aluno)
             return None
         
-        # Adiciona informações do interesse
-        todos_resultados['COD_ALUNO'] = dados_interesse['COD_ALUNO']
-        todos_resultados['CURSO_INTERESSE'] = dados_interesse['TITULO_INTERESSE']
-        todos_resultados['UNIDADE_INTERESSE'] = dados_interesse['UNIDADE_INTERESSE']
-        todos_resultados['AREA_INTERESSE'] = dados_interesse['AREA_INTERESSE']
-        todos_resultados['MODALIDADE_INTERESSE'] = dados_interesse['MODALIDADE_INTERESSE']
-        
-        # Ordenação por prioridade
-        ordem_prioridade = {
-            '1.MATCH_COMPLETO': 1,
-            '2.OUTRA_UNIDADE': 2,
-            '3.TRILHA_PROFISSIONAL': 3,
-            '4.SIMILARIDADE_SEMANTICA': 4,
-            '5.MODALIDADE_EAD': 5
-        }
+        resultado = self.gerar_recomendacoes_alunos([cod_aluno], limite=limite)
+        resultado = None if resultado.empty else resultado
         
-        todos_resultados['PRIORIDADE'] = todos_resultados['TIPO_INDICACAO'].map(ordem_prioridade)
+        self.cache_resultados.guardar(chave, resultado)
+        return None if resultado is None else resultado.copy()
+    
+    def gerar_recomendacoes_alunos(self, cod_alunos, limite=None):
+        """
+        Versão em lote de `gerar_recomendacoes_aluno` para vários alunos.
+        
+        Args:
+            cod_alunos: Lista de códigos de aluno
+            limite: Quantidade máxima de recomendações por aluno (padrão: todas)
+            
+        Returns:
+            DataFrame com uma linha por (COD_ALUNO, COD_OFERTA), na ordem dos alunos
+            recebida e por prioridade dentro de cada aluno. Vazio se não houver recomendações.
+        """
+        cods_aluno = list(dict.fromkeys(cod_alunos))
+        posicoes = [self.posicoes_aluno[cod] for cod in cods_aluno if cod in self.posicoes_aluno]
+        if not posicoes:
+            return pd.DataFrame()
         
-        # Ordena por prioridade e distância
-        if 'DISTANCIA_KM' in todos_resultados.columns:
-            todos_resultados['DISTANCIA_KM'] = todos_resultados['DISTANCIA_KM'].fillna(0)
-            todos_resultados = todos_resultados.sort_values(
-                ['PRIORIDADE', 'DISTANCIA_KM', 'SCORE_SIMILARIDADE'],
-                ascending=[True, True, False]
+        cod_interesses = self.df_interesses['COD_INTERESSE'].to_numpy()[np.concatenate(posicoes)]
+        resultado = self.gerar_recomendacoes_lote(cod_interesses.tolist())
+        if resultado.empty:
+            return resultado
+        
+        # Códigos de interesse repetidos entre alunos são atribuídos à primeira ocorrência
+        resultado = resultado[resultado['COD_ALUNO'].isin(cods_aluno)]
+        
+        # Mesma ordenação de gerar_recomendacoes, agrupada por aluno (estável: empates
+        # mantêm a ordem dos interesses)
+        ordem_aluno = resultado['COD_ALUNO'].map({cod: i for i, cod in enumerate(cods_aluno)})
+        ordem = np.lexsort((
+            (-resultado['SCORE_SIMILARIDADE']).fillna(np.inf).to_numpy(),
+            resultado['DISTANCIA_KM'].fillna(0).to_numpy(),
+            resultado['PRIORIDADE'].to_numpy(),
+            ordem_aluno.to_numpy()
+        ))
+        resultado = resultado.iloc[ordem]
+        
+        # Uma linha por oferta: a primeira (melhor prioridade) entre os interesses do aluno
+        resultado['QTD_INTERESSES'] = resultado.groupby(
+            ['COD_ALUNO', 'COD_OFERTA'], sort=False
+        )['COD_INTERESSE'].transform('nunique')
+        resultado = resultado.drop_duplicates(['COD_ALUNO', 'COD_OFERTA'])
+        
+        if limite is not None:
+            resultado = resultado.groupby('COD_ALUNO', sort=False).head(limite)
+        
+        return resultado.reset_index(drop=True)
+    
+    def filtrar_interesses_conhecidos(self, cod_interesses):
+        """
+        Remove da lista os interesses que não estão na base, emitindo um único aviso
+        com a quantidade e alguns exemplos de códigos desconhecidos.
+        
+        Returns:
+            Lista dos códigos conhecidos, na ordem recebida
+        """
+        conhecidos, desconhecidos = [], []
+        for cod in cod_interesses:
+            (conhecidos if cod in self.posicao_interesse else desconhecidos).append(cod)
+        
+        if desconhecidos:
+            desconhecidos = list(dict.fromkeys(desconhecidos))
+            logger.warning("⚠️ %d interesses não encontrados (ex.: %s)",
+                           len(desconhecidos), ', '.join(map(str, desconhecidos[:AMOSTRA_DESCONHECIDOS])))
+        
+        return conhecidos
+    
+    def _lote_interesses(self, cod_interesses):
+        """Seleciona os interesses do lote com as colunas usadas nas junções"""
+        cods = list(dict.fromkeys(cod_interesses))
+        ordem = pd.Series(np.arange(len(cods)), index=pd.Index(cods))
+        
+        # Primeira ocorrência de cada código (índice por código), na ordem de df_interesses
+        posicoes = np.sort(np.array(
+            [self.posicao_interesse[cod] for cod in cods if cod in self.posicao_interesse], dtype=np.int64
+        ))
+        interesses = self.df_interesses.iloc[posicoes]
+        
+        return pd.DataFrame({
+            '_ORDEM_INTERESSE': interesses['COD_INTERESSE'].map(ordem).to_numpy(),
+            '_POS_INTERESSE': posicoes,
+            '_COD_CURSO_I': interesses['COD_CURSO'].to_numpy(),
+            '_COD_UNIDADE_I': interesses['COD_UNIDADE'].to_numpy(),
+            '_DATA_I': pd.to_datetime(interesses['DATA_INTERESSE']).to_numpy(),
+            '_AGENDA_I': interesses['MASCARA_AGENDA'].to_numpy()
+        })
+    
+    def _lote_ofertas(self):
+        """Colunas das ofertas usadas nas junções, com a posição em df_ofertas"""
+        return pd.DataFrame({
+            '_POS_OFERTA': np.arange(len(self.df_ofertas)),
+            'COD_CURSO': self.df_ofertas['COD_CURSO'].to_numpy(),
+            'COD_UNIDADE': self.df_ofertas['COD_UNIDADE'].to_numpy(),
+            'DATA_CRIACAO': self.df_ofertas['DATA_CRIACAO'].to_numpy(),
+            '_AGENDA_O': self.df_ofertas['MASCARA_AGENDA'].to_numpy()
+        })
+    
+    @staticmethod
+    def _lote_pares(pares, tipo, nivel, ordem_nivel, **extras):
+        """Padroniza o resultado de uma estratégia em lote"""
+        return pd.DataFrame({
+            '_ORDEM_INTERESSE': pares['_ORDEM_INTERESSE'].to_numpy(),
+            '_POS_OFERTA': pares['_POS_OFERTA'].to_numpy(),
+            'TIPO_INDICACAO': tipo,
+            'NIVEL_MATCH': nivel,
+            '_ORDEM_NIVEL': ordem_nivel,
+            'DISTANCIA_KM': extras.get('DISTANCIA_KM', np.nan),
+            'AREA_PROFISSIONAL': extras.get('AREA_PROFISSIONAL', np.nan),
+            'SCORE_SIMILARIDADE': extras.get('SCORE_SIMILARIDADE', np.nan)
+        })
+    
+    def _lote_mesmo_curso(self, base_int, base_of):
+        """Matches 1 e 2 em lote: mesmo curso na mesma unidade e em outras unidades"""
+        pares = base_int.merge(base_of, left_on='_COD_CURSO_I', right_on='COD_CURSO')
+        pares = pares[pares['DATA_CRIACAO'] >= pares['_DATA_I']]
+        
+        dias, turnos = self._agenda_compativel(pares['_AGENDA_O'].to_numpy(), pares['_AGENDA_I'].to_numpy())
+        ordem_nivel = np.select([dias & turnos, dias], [0, 1], 2)
+        
+        mesma_unidade = (pares['COD_UNIDADE'] == pares['_COD_UNIDADE_I']).to_numpy()
+        
+        # Match 1: mesma unidade
+        match1 = self._lote_pares(
+            pares[mesma_unidade], '1.MATCH_COMPLETO',
+            np.array(['CURSO+UNIDADE+DIAS+TURNOS', 'CURSO+UNIDADE+DIAS', 'CURSO+UNIDADE'])[ordem_nivel[mesma_unidade]],
+            ordem_nivel[mesma_unidade]
+        )
+        
+        # Match 2: outras unidades (apenas se a unidade do interesse tem coordenadas)
+        outra = ~mesma_unidade & pares['_COD_UNIDADE_I'].isin(self.unidade_coord_dict.keys()).to_numpy()
+        outra[outra] = self._mascara_unidades_proximas(
+            pares['_COD_UNIDADE_I'].to_numpy()[outra], pares['COD_UNIDADE'].to_numpy()[outra]
+        )
+        pares_outra = pares[outra]
+        
+        match2 = self._lote_pares(
+            pares_outra, '2.OUTRA_UNIDADE',
+            np.array(['CURSO+DIAS+TURNOS', 'CURSO+DIAS', 'CURSO'])[ordem_nivel[outra]],
+            ordem_nivel[outra],
+            DISTANCIA_KM=self._distancias_unidades(
+                pares_outra['_COD_UNIDADE_I'].to_numpy(), pares_outra['COD_UNIDADE'].to_numpy()
             )
+        )
+        
+        return match1, match2
+    
+    def _lote_trilha_profissional(self, base_int, base_of):
+        """Match 3 em lote: cursos das trilhas profissionais do curso, na mesma unidade"""
+        pares = base_int.merge(self.pares_trilha, on='_COD_CURSO_I').merge(
+            base_of,
+            left_on=['_COD_CURSO_TRILHA', '_COD_UNIDADE_I'],
+            right_on=['COD_CURSO', 'COD_UNIDADE']
+        )
+        pares = pares[pares['DATA_CRIACAO'] >= pares['_DATA_I']]
+        
+        return self._lote_pares(
+            pares, '3.TRILHA_PROFISSIONAL', 'AREA_PROFISSIONAL+MESMA_UNIDADE', 0,
+            AREA_PROFISSIONAL=pares['AREA_PROFISSIONAL'].to_numpy()
+        )
+    
+    def _lote_similaridade(self, base_int, base_of, apenas_ead):
+        """Matches 4 (mesma unidade) e 5 (EAD) em lote, uma busca por curso distinto"""
+        similares = [
+            (cod, cod_similar, score)
+            for cod in base_int['_COD_CURSO_I'].dropna().unique().tolist()
+            for cod_similar, score in self._buscar_cursos_similares(
+                cod, top_n=5, apenas_ead=apenas_ead, score_minimo=LIMIAR_SIMILARIDADE
+            )[1].items()
+        ]
+        similares = pd.DataFrame(similares, columns=['_COD_CURSO_I', '_COD_CURSO_SIMILAR', 'SCORE_SIMILARIDADE'])
+        
+        pares = base_int.merge(similares, on='_COD_CURSO_I')
+        
+        if apenas_ead:
+            ofertas_ead = base_of[self.df_ofertas['MODALIDADE_OFERTA'].str.contains('EAD', na=False).to_numpy()]
+            pares = pares.merge(ofertas_ead, left_on='_COD_CURSO_SIMILAR', right_on='COD_CURSO')
+            tipo, nivel = '5.MODALIDADE_EAD', 'CURSO_EAD_SIMILAR'
         else:
-            todos_resultados = todos_resultados.sort_values(
-                ['PRIORIDADE', 'SCORE_SIMILARIDADE'],
-                ascending=[True, False]
+            pares = pares.merge(
+                base_of,
+                left_on=['_COD_CURSO_SIMILAR', '_COD_UNIDADE_I'],
+                right_on=['COD_CURSO', 'COD_UNIDADE']
             )
+            tipo, nivel = '4.SIMILARIDADE_SEMANTICA', 'TITULO_SIMILAR+MESMA_UNIDADE'
         
-        # Filtra similaridades alta
-        '''
-        Similaridade cosseno varia de 0 a 1:
-
-        1.0 = curso idêntico (mesmo embedding)
-
-        0.0 = curso totalmente diferente
-
-        > 0.7 geralmente indica similaridade "boa o suficiente"
+        pares = pares[pares['DATA_CRIACAO'] >= pares['_DATA_I']]
         
-        '''
-        if 'SCORE_SIMILARIDADE' in todos_resultados.columns:
-            todos_resultados = todos_resultados[
-                (todos_resultados['SCORE_SIMILARIDADE'].isna()) |   #Mantém recomendações não baseadas em similaridade
-                (todos_resultados['SCORE_SIMILARIDADE'] > 0.7)  # Mantém apenas recomendações COM ALTA similaridade
-            ]
+        return self._lote_pares(
+            pares, tipo, nivel, 0,
+            SCORE_SIMILARIDADE=pares['SCORE_SIMILARIDADE'].to_numpy()
+        )
+    
+    def _lote_montar_resultado(self, pares, base_int):
+        """Junta colunas das ofertas, das unidades e dos interesses aos pares ordenados"""
+        resultado = self.df_ofertas.iloc[pares['_POS_OFERTA'].to_numpy()].reset_index(drop=True)
+        resultado['TIPO_INDICACAO'] = pares['TIPO_INDICACAO'].to_numpy()
+        resultado['NIVEL_MATCH'] = pares['NIVEL_MATCH'].to_numpy()
+        
+        # Dados da unidade da oferta (preenchidos apenas para outras unidades, como no match 2)
+        outra_unidade = (pares['TIPO_INDICACAO'] == '2.OUTRA_UNIDADE').to_numpy()
+        unidades = self.df_unidades.drop_duplicates('COD_UNIDADE').set_index('COD_UNIDADE')
+        for coluna in ['NOME_UNIDADE', 'LATITUDE', 'LONGITUDE']:
+            valores = resultado['COD_UNIDADE'].map(unidades[coluna])
+            resultado[coluna] = valores.where(outra_unidade)
+        
+        resultado['DISTANCIA_KM'] = pares['DISTANCIA_KM'].to_numpy()
+        resultado['AREA_PROFISSIONAL'] = pares['AREA_PROFISSIONAL'].to_numpy()
+        resultado['SCORE_SIMILARIDADE'] = pares['SCORE_SIMILARIDADE'].to_numpy()
+        
+        # Informações do interesse
+        posicoes_interesse = base_int.set_index('_ORDEM_INTERESSE')['_POS_INTERESSE']
+        interesses = self.df_interesses.iloc[
+            posicoes_interesse.loc[pares['_ORDEM_INTERESSE'].to_numpy()].to_numpy()
+        ]
+        resultado['COD_INTERESSE'] = interesses['COD_INTERESSE'].to_numpy()
+        resultado['COD_ALUNO'] = interesses['COD_ALUNO'].to_numpy()
+        resultado['CURSO_INTERESSE'] = interesses['TITULO_INTERESSE'].to_numpy()
+        resultado['UNIDADE_INTERESSE'] = interesses['UNIDADE_INTERESSE'].to_numpy()
+        resultado['AREA_INTERESSE'] = interesses['AREA_INTERESSE'].to_numpy()
+        resultado['MODALIDADE_INTERESSE'] = interesses['MODALIDADE_INTERESSE'].to_numpy()
+        resultado['PRIORIDADE'] = pares['PRIORIDADE'].to_numpy()
+        
+        return resultado
+    
+    def interesses_para_oferta(self, cod_oferta):
+        """
+        Interesses que receberiam a oferta como recomendação (consulta inversa).
+        
+        Usa o índice inverso de interesses (por curso, por curso+unidade, por trilha e
+        por vizinhos de similaridade) em vez de avaliar todos os interesses, com as
+        mesmas regras e níveis de `gerar_recomendacoes`. Pensado para rodar a cada
+        oferta incluída (após `atualizar_ofertas`).
+        
+        Args:
+            cod_oferta: Código de uma oferta presente em df_ofertas
+            
+        Returns:
+            DataFrame com um registro por interesse (a melhor indicação), ordenado por
+            prioridade: COD_INTERESSE, COD_ALUNO, COD_CURSO, COD_UNIDADE, TIPO_INDICACAO,
+            NIVEL_MATCH, DISTANCIA_KM, AREA_PROFISSIONAL, SCORE_SIMILARIDADE e PRIORIDADE.
+            Vazio se nenhum interesse for compatível; None se a oferta não existir.
+        """
+        posicao = self.posicao_oferta.get(cod_oferta)
+        if posicao is None:
+            logger.warning("⚠️ Nenhuma oferta encontrada com código %s", cod_oferta)
+            return None
+        
+        oferta = self.df_ofertas.iloc[posicao]
+        indice = self.indice_reverso
+        cod_curso, cod_unidade = oferta['COD_CURSO'], oferta['COD_UNIDADE']
+        
+        def posicoes(mapa, chaves):
+            encontradas = [mapa[chave] for chave in chaves if chave in mapa]
+            return np.concatenate(encontradas) if encontradas else np.empty(0, dtype=np.int64)
         
-        print(f"\n✅ Total de recomendações geradas: {len(todos_resultados)}")
+        def validas(pos):
+            # Interesses registrados até a criação da oferta
+            return pos[indice['datas'][pos] <= np.datetime64(oferta['DATA_CRIACAO'])]
+        
+        resultados = []
         
-        return todos_resultados
+        # Matches 1 e 2: mesmo curso (nível pela compatibilidade de agenda)
+        pos = validas(indice['curso'].get(cod_curso, np.empty(0, dtype=np.int64)))
+        dias, turnos = self._agenda_compativel(indice['agendas'][pos], oferta['MASCARA_AGENDA'])
+        ordem_nivel = np.select([dias & turnos, dias], [0, 1], 2)
+        
+        unidades = indice['unidades'][pos]
+        mesma_unidade = unidades == cod_unidade
+        resultados.append(self._pares_inversos(
+            pos[mesma_unidade], '1.MATCH_COMPLETO',
+            np.array(['CURSO+UNIDADE+DIAS+TURNOS', 'CURSO+UNIDADE+DIAS', 'CURSO+UNIDADE'])[ordem_nivel[mesma_unidade]],
+            ordem_nivel[mesma_unidade]
+        ))
+        
+        outra = ~mesma_unidade & pd.Series(unidades).isin(self.unidade_coord_dict.keys()).to_numpy()
+        outra[outra] = self._mascara_unidades_proximas(unidades[outra], np.full(outra.sum(), cod_unidade, dtype=object))
+        resultados.append(self._pares_inversos(
+            pos[outra], '2.OUTRA_UNIDADE',
+            np.array(['CURSO+DIAS+TURNOS', 'CURSO+DIAS', 'CURSO'])[ordem_nivel[outra]],
+            ordem_nivel[outra],
+            DISTANCIA_KM=self._distancias_unidades(unidades[outra], np.full(outra.sum(), cod_unidade, dtype=object))
+        ))
+        
+        # Match 3: interesses na unidade da oferta cuja trilha contém o curso
+        trilha = indice['trilha'].get(cod_curso, {})
+        pos = validas(posicoes(indice['curso_unidade'], [(cod, cod_unidade) for cod in trilha]))
+        resultados.append(self._pares_inversos(
+            pos, '3.TRILHA_PROFISSIONAL', 'AREA_PROFISSIONAL+MESMA_UNIDADE', 0,
+            AREA_PROFISSIONAL=pd.Series(indice['cursos'][pos]).map(trilha).to_numpy()
+        ))
+        
+        # Matches 4 e 5: interesses cujo curso tem o da oferta entre os similares
+        for apenas_ead in (False, True):
+            if apenas_ead and 'EAD' not in str(oferta['MODALIDADE_OFERTA']):
+                continue
+            
+            vizinhos = self._vizinhos_inversos(apenas_ead).get(cod_curso, {})
+            if apenas_ead:
+                pos = validas(posicoes(indice['curso'], vizinhos))
+                tipo, nivel = '5.MODALIDADE_EAD', 'CURSO_EAD_SIMILAR'
+            else:
+                pos = validas(posicoes(indice['curso_unidade'], [(cod, cod_unidade) for cod in vizinhos]))
+                tipo, nivel = '4.SIMILARIDADE_SEMANTICA', 'TITULO_SIMILAR+MESMA_UNIDADE'
+            
+            resultados.append(self._pares_inversos(
+                pos, tipo, nivel, 0,
+                SCORE_SIMILARIDADE=pd.Series(indice['cursos'][pos]).map(vizinhos).to_numpy(dtype=float)
+            ))
+        
+        pares = pd.concat(resultados, ignore_index=True)
+        
+        # Melhor indicação por interesse, na ordem de prioridade de gerar_recomendacoes
+        pares['PRIORIDADE'] = pares['TIPO_INDICACAO'].map(ORDEM_PRIORIDADE)
+        ordem = np.lexsort((
+            pares['_POS_INTERESSE'].to_numpy(),
+            pares['_ORDEM_NIVEL'].to_numpy(),
+            (-pares['SCORE_SIMILARIDADE']).fillna(np.inf).to_numpy(),
+            pares['DISTANCIA_KM'].fillna(0).to_numpy(),
+            pares['PRIORIDADE'].to_numpy()
+        ))
+        pares = pares.iloc[ordem].drop_duplicates('_POS_INTERESSE')
+        
+        interesses = self.df_interesses.iloc[pares['_POS_INTERESSE'].to_numpy()]
+        return pd.DataFrame({
+            'COD_INTERESSE': interesses['COD_INTERESSE'].to_numpy(),
+            'COD_ALUNO': interesses['COD_ALUNO'].to_numpy(),
+            'COD_CURSO': interesses['COD_CURSO'].to_numpy(),
+            'COD_UNIDADE': interesses['COD_UNIDADE'].to_numpy(),
+            'TIPO_INDICACAO': pares['TIPO_INDICACAO'].to_numpy(),
+            'NIVEL_MATCH': pares['NIVEL_MATCH'].to_numpy(),
+            'DISTANCIA_KM': pares['DISTANCIA_KM'].to_numpy(),
+            'AREA_PROFISSIONAL': pares['AREA_PROFISSIONAL'].to_numpy(),
+            'SCORE_SIMILARIDADE': pares['SCORE_SIMILARIDADE'].to_numpy(),
+            'PRIORIDADE': pares['PRIORIDADE'].to_numpy()
+        })
+    
+    @staticmethod
+    def _pares_inversos(posicoes, tipo, nivel, ordem_nivel, **extras):
+        """Padroniza os interesses encontrados por uma estratégia na consulta inversa"""
+        return pd.DataFrame({
+            '_POS_INTERESSE': posicoes,
+            'TIPO_INDICACAO': tipo,
+            'NIVEL_MATCH': nivel,
+            '_ORDEM_NIVEL': ordem_nivel,
+            'DISTANCIA_KM': extras.get('DISTANCIA_KM', np.nan),
+            'AREA_PROFISSIONAL': extras.get('AREA_PROFISSIONAL', np.nan),
+            'SCORE_SIMILARIDADE': extras.get('SCORE_SIMILARIDADE', np.nan)
+        })
+    
+    @property
+    def indice_reverso(self):
+        """Índice inverso dos interesses (construído no primeiro uso)"""
+        if self._indice_reverso is None:
+            t1 = time.time()
+            self._indice_reverso = self._construir_indice_reverso()
+            logger.info('⌛ Índice inverso de interesses pronto em %.2f segundos', time.time() - t1)
+        return self._indice_reverso
+    
+    def _construir_indice_reverso(self):
+        """
+        Posições dos interesses (primeira ocorrência de cada código) por curso e por
+        (curso, unidade), arrays dos campos usados nos filtros e, por curso de oferta,
+        os cursos de interesse cuja trilha o contém.
+        """
+        posicoes = np.fromiter(self.posicao_interesse.values(), dtype=np.int64, count=len(self.posicao_interesse))
+        interesses = self.df_interesses.iloc[posicoes]
+        
+        def agrupar(colunas):
+            return {
+                chave: posicoes[grupo]
+                for chave, grupo in interesses.groupby(colunas, sort=False, observed=True).indices.items()
+            }
+        
+        trilha = {}
+        for cod_interesse, cod_trilha, area in self.pares_trilha.itertuples(index=False):
+            trilha.setdefault(cod_trilha, {})[cod_interesse] = area
+        
+        return {
+            'curso': agrupar('COD_CURSO'),
+            'curso_unidade': agrupar(['COD_CURSO', 'COD_UNIDADE']),
+            'trilha': trilha,
+            'cursos': self.df_interesses['COD_CURSO'].to_numpy(),
+            'unidades': self.df_interesses['COD_UNIDADE'].to_numpy(),
+            'agendas': self.df_interesses['MASCARA_AGENDA'].to_numpy(),
+            'datas': pd.to_datetime(self.df_interesses['DATA_INTERESSE']).to_numpy(),
+            'similares': {}
+        }
+    
+    def _vizinhos_inversos(self, apenas_ead):
+        """
+        Para cada curso, os cursos de interesse que o têm entre os similares e o score
+        ({cod_curso: {cod_curso_interesse: score}}). Uma busca por curso de interesse
+        distinto, feita no primeiro uso de cada partição.
+        """
+        similares = self.indice_reverso['similares']
+        particao = 'ead' if apenas_ead else 'geral'
+        
+        if particao not in similares:
+            inverso = {}
+            for cod in pd.unique(self.df_interesses['COD_CURSO'].dropna()).tolist():
+                vizinhos = self._buscar_cursos_similares(
+                    cod, top_n=5, apenas_ead=apenas_ead, score_minimo=LIMIAR_SIMILARIDADE
+                )[1]
+                for cod_similar, score in vizinhos.items():
+                    inverso.setdefault(cod_similar, {})[cod] = score
+            similares[particao] = inverso
+        
+        return similares[particao]
     
     def listar_interesses_disponiveis(self):
         """Retorna lista de interesses disponíveis para consulta"""
@@ -0,0 +1,158 @@
+"""
+Snapshot compilado do estado carregado
+Grava as bases já processadas (parquet) e os embeddings para acelerar inicializações
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Incrementar quando o pré-processamento das bases mudar
+VERSAO_SNAPSHOT = 1
+
+TABELAS = ['df_unidades', 'df_cursos', 'df_interesses', 'df_ofertas', 'df_trilhas']
+
+
+def _diretorio_versao(diretorio):
+    return os.path.join(diretorio, f'v{VERSAO_SNAPSHOT}')
+
+
+def _sha256_arquivo(path, tamanho_bloco=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def descrever_fontes(fontes, calcular_hash=True):
+    """
+    Metadados dos arquivos de origem usados para invalidar o snapshot.
+
+    Args:
+        fontes: Dicionário {nome: caminho}
+        calcular_hash: Se False, registra apenas caminho, mtime e tamanho
+    """
+    descricao = {}
+    for nome, path in fontes.items():
+        info = os.stat(path)
+        descricao[nome] = {
+            'path': os.path.abspath(path),
+            'mtime_ns': info.st_mtime_ns,
+            'tamanho': info.st_size,
+            'sha256': _sha256_arquivo(path) if calcular_hash else None
+        }
+    return descricao
+
+
+def _fonte_inalterada(gravada, path):
+    """Mesmo arquivo se mtime e tamanho coincidem; se não, compara o conteúdo (hash)"""
+    if gravada['path'] != os.path.abspath(path) or not os.path.exists(path):
+        return False
+
+    info = os.stat(path)
+    if info.st_mtime_ns == gravada['mtime_ns'] and info.st_size == gravada['tamanho']:
+        return True
+
+    return info.st_size == gravada['tamanho'] and _sha256_arquivo(path) == gravada['sha256']
+
+
+def carregar_snapshot(diretorio, fontes, nome_modelo):
+    """
+    Carrega o snapshot se ele corresponder às fontes e ao modelo atuais.
+
+    Returns:
+        Dicionário com os DataFrames de TABELAS e 'embeddings' (ou None se o snapshot
+        não tiver embeddings), ou None se o snapshot estiver ausente ou desatualizado
+    """
+    pasta = _diretorio_versao(diretorio)
+    path_manifesto = os.path.join(pasta, 'manifesto.json')
+
+    if not os.path.exists(path_manifesto):
+        return None
+
+    with open(path_manifesto, encoding='utf-8') as f:
+        manifesto = json.load(f)
+
+    if manifesto.get('versao') != VERSAO_SNAPSHOT or set(manifesto.get('fontes', {})) != set(fontes):
+        return None
+
+    if not all(_fonte_inalterada(manifesto['fontes'][nome], path) for nome, path in fontes.items()):
+        return None
+
+    estado = {nome: pd.read_parquet(os.path.join(pasta, f'{nome}.parquet')) for nome in TABELAS}
+
+    path_embeddings = os.path.join(pasta, 'embeddings.npy')
+    if manifesto.get('modelo') == nome_modelo and os.path.exists(path_embeddings):
+        estado['embeddings'] = np.load(path_embeddings, mmap_mode='r')
+    else:
+        estado['embeddings'] = None
+
+    return estado
+
+
+def salvar_snapshot(diretorio, fontes, tabelas, embeddings=None, nome_modelo=None):
+    """
+    Grava o snapshot em <diretorio>/v<VERSAO_SNAPSHOT>, substituindo o anterior.
+
+    Args:
+        diretorio: Diretório base dos snapshots
+        fontes: Dicionário {nome: caminho} dos arquivos de origem
+        tabelas: Dicionário {nome: DataFrame} com as chaves de TABELAS
+        embeddings: Matriz de embeddings do catálogo (opcional)
+        nome_modelo: Modelo que gerou os embeddings
+    """
+    pasta = _diretorio_versao(diretorio)
+    tmp = f'{pasta}.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    for nome in TABELAS:
+        tabelas[nome].to_parquet(os.path.join(tmp, f'{nome}.parquet'), index=False)
+
+    if embeddings is not None:
+        np.save(os.path.join(tmp, 'embeddings.npy'), np.asarray(embeddings))
+
+    manifesto = {
+        'versao': VERSAO_SNAPSHOT,
+        'criado_em': pd.Timestamp.now().isoformat(),
+        'modelo': nome_modelo if embeddings is not None else None,
+        'fontes': descrever_fontes(fontes)
+    }
+    with open(os.path.join(tmp, 'manifesto.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2)
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(tmp, pasta)
+
+
+def salvar_embeddings(diretorio, embeddings, nome_modelo):
+    """
+    Acrescenta os embeddings a um snapshot já gravado (calculados sob demanda, após as bases).
+
+    Returns:
+        True se o snapshot existia e foi atualizado
+    """
+    pasta = _diretorio_versao(diretorio)
+    path_manifesto = os.path.join(pasta, 'manifesto.json')
+
+    if not os.path.exists(path_manifesto):
+        return False
+
+    with open(path_manifesto, encoding='utf-8') as f:
+        manifesto = json.load(f)
+
+    tmp = os.path.join(pasta, 'embeddings.tmp.npy')
+    np.save(tmp, np.asarray(embeddings))
+    os.replace(tmp, os.path.join(pasta, 'embeddings.npy'))
+
+    manifesto['modelo'] = nome_modelo
+    with open(f'{path_manifesto}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2)
+    os.replace(f'{path_manifesto}.tmp', path_manifesto)
+
+    return True
@@ -0,0 +1,290 @@
+"""
+Tabela pré-calculada de cursos similares
+Vizinhos top-K de cada curso (do catálogo ativo e consultas extras), geral e restrito a cursos EAD
+"""
+
+import os
+
+import numpy as np
+
+from cache_embeddings import CacheEmbeddings
+
+# Vizinhos armazenados por curso (deve cobrir o maior top_n usado nas estratégias)
+K_PADRAO = 10
+
+PARTICOES = ('geral', 'ead')
+
+# Consultas processadas por vez ao calcular a tabela
+TAMANHO_BLOCO = 1024
+
+
+def hash_textos(textos):
+    """Hashes dos textos normalizados (mesma chave do cache de embeddings)"""
+    return np.array([
+        CacheEmbeddings.hash_texto(CacheEmbeddings.normalizar_texto(t)) for t in textos
+    ])
+
+
+def normalizar_vetores(vetores):
+    """Normaliza as linhas para norma 1 (produto interno = similaridade cosseno)"""
+    vetores = np.asarray(vetores, dtype=np.float32)
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    return np.divide(vetores, normas, out=np.zeros_like(vetores), where=normas > 0)
+
+
+def selecionar_top_k(scores, k):
+    """
+    Seleciona os k maiores valores de cada linha, em ordem decrescente.
+
+    Returns:
+        Tupla (posicoes, scores) com shape (linhas, min(k, colunas))
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0), dtype=np.float32)
+
+    if k < scores.shape[1]:
+        candidatos = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidatos = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+
+    scores_candidatos = np.take_along_axis(scores, candidatos, axis=1)
+    ordem = np.argsort(-scores_candidatos, axis=1, kind='stable')
+
+    return np.take_along_axis(candidatos, ordem, axis=1), np.take_along_axis(scores_candidatos, ordem, axis=1)
+
+
+class TabelaSimilares:
+    """
+    Vizinhos mais próximos de cada curso, por partição.
+
+    Partições:
+        geral: vizinhos entre todos os cursos ativos do catálogo
+        ead: vizinhos apenas entre cursos EAD (consultas continuam sendo todos os cursos)
+
+    As consultas são os cursos do catálogo mais as consultas extras (cursos fora do
+    catálogo ativo, que podem ter interesses mas nunca aparecem como vizinhos).
+
+    Cada partição guarda os códigos e hashes das consultas e da base, o que permite
+    reconstruir de forma incremental apenas o que mudou no catálogo.
+    """
+
+    def __init__(self, k, nome_modelo, particoes):
+        self.k = k
+        self.nome_modelo = nome_modelo
+        self.particoes = particoes
+        self._posicoes = {
+            nome: {cod: i for i, cod in enumerate(dados['consultas'].tolist())}
+            for nome, dados in particoes.items()
+        }
+
+    @classmethod
+    def construir(cls, codigos, textos, embeddings, mascara_ead, nome_modelo, k=K_PADRAO, anterior=None,
+                  consultas_extras=None):
+        """
+        Calcula a tabela de vizinhos para o catálogo.
+
+        Args:
+            codigos: Códigos dos cursos (alinhados com embeddings)
+            textos: Textos AREA_TITULO usados para gerar os embeddings
+            embeddings: Matriz de embeddings do catálogo
+            mascara_ead: Máscara booleana dos cursos EAD
+            nome_modelo: Modelo que gerou os embeddings
+            k: Quantidade de vizinhos por curso
+            anterior: Tabela já existente; se compatível, apenas cursos afetados são recalculados
+            consultas_extras: Tupla (códigos, textos, embeddings) de cursos fora do catálogo
+                que também recebem linha de vizinhos
+
+        Returns:
+            TabelaSimilares
+        """
+        codigos = np.asarray(codigos)
+        hashes = hash_textos(textos)
+        vetores = normalizar_vetores(embeddings)
+        mascara_ead = np.asarray(mascara_ead, dtype=bool)
+
+        # Um curso duplicado no catálogo é considerado apenas uma vez
+        _, primeiros = np.unique(codigos, return_index=True)
+        primeiros = np.sort(primeiros)
+        codigos, hashes, vetores, mascara_ead = codigos[primeiros], hashes[primeiros], vetores[primeiros], mascara_ead[primeiros]
+
+        # Consultas: catálogo seguido das extras que não estão nele
+        codigos_consulta, hashes_consulta, vetores_consulta = codigos, hashes, vetores
+        if consultas_extras is not None and len(consultas_extras[0]):
+            codigos_extras = np.asarray(consultas_extras[0])
+            _, primeiros = np.unique(codigos_extras, return_index=True)
+            primeiros = np.sort(primeiros)
+            primeiros = primeiros[~np.isin(codigos_extras[primeiros], codigos)]
+
+            codigos_consulta = np.concatenate([codigos, codigos_extras[primeiros]])
+            hashes_consulta = np.concatenate([hashes, hash_textos(consultas_extras[1])[primeiros]])
+            vetores_consulta = np.vstack([vetores, normalizar_vetores(consultas_extras[2])[primeiros]])
+
+        reaproveitar = (
+            anterior is not None and anterior.k == k and anterior.nome_modelo == nome_modelo
+        )
+
+        particoes = {}
+        for nome, mascara_base in (('geral', np.ones(len(codigos), dtype=bool)), ('ead', mascara_ead)):
+            particoes[nome] = _construir_particao(
+                codigos_consulta, hashes_consulta, vetores_consulta,
+                codigos[mascara_base], hashes[mascara_base], vetores[mascara_base],
+                k, anterior.particoes.get(nome) if reaproveitar else None
+            )
+
+        return cls(k, nome_modelo, particoes)
+
+    def salvar(self, path):
+        """Grava a tabela em um arquivo .npz"""
+        arrays = {'k': np.array(self.k), 'nome_modelo': np.array(self.nome_modelo)}
+        for nome, dados in self.particoes.items():
+            for chave, valor in dados.items():
+                arrays[f'{nome}__{chave}'] = valor
+
+        # Grava em arquivo temporário para não corromper a tabela em uso
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def carregar(cls, path):
+        """Carrega uma tabela gravada com `salvar`"""
+        with np.load(path, allow_pickle=False) as dados:
+            particoes = {nome: {} for nome in PARTICOES}
+            for chave in dados.files:
+                if '__' in chave:
+                    nome, campo = chave.split('__', 1)
+                    particoes[nome][campo] = dados[chave]
+            return cls(int(dados['k']), str(dados['nome_modelo']), particoes)
+
+    def compativel(self, codigos, textos, nome_modelo, consultas_extras=None):
+        """
+        Indica se a tabela foi construída para o mesmo catálogo e modelo.
+
+        Com consultas_extras (tupla códigos, textos), também exige que as linhas
+        gravadas desses cursos tenham sido calculadas com o texto atual; cursos
+        sem linha não invalidam a tabela (são buscados pelos embeddings).
+        """
+        if nome_modelo != self.nome_modelo:
+            return False
+
+        atual = dict(zip(np.asarray(codigos).tolist(), hash_textos(textos).tolist()))
+        geral = self.particoes['geral']
+        gravado = dict(zip(geral['base'].tolist(), geral['hashes_base'].tolist()))
+        if atual != gravado:
+            return False
+
+        if consultas_extras is not None and len(consultas_extras[0]):
+            consultas = dict(zip(geral['consultas'].tolist(), geral['hashes_consultas'].tolist()))
+            for cod, h in zip(np.asarray(consultas_extras[0]).tolist(), hash_textos(consultas_extras[1]).tolist()):
+                if consultas.get(cod, h) != h:
+                    return False
+
+        return True
+
+    def vizinhos(self, cod_curso, top_n, particao='geral'):
+        """
+        Retorna os vizinhos pré-calculados do curso.
+
+        Returns:
+            Dicionário {COD_CURSO: score} em ordem decrescente de score, ou None se o
+            curso não estiver na tabela ou top_n exceder o K armazenado
+        """
+        posicao = self._posicoes[particao].get(cod_curso)
+        if posicao is None or top_n > self.k:
+            return None
+
+        dados = self.particoes[particao]
+        vizinhos = dados['vizinhos'][posicao, :top_n]
+        scores = dados['scores'][posicao, :top_n]
+        validos = vizinhos >= 0
+
+        return dict(zip(
+            dados['base'][vizinhos[validos]].tolist(),
+            scores[validos].tolist()
+        ))
+
+
+def _top_k_excluindo_proprio(codigos_consulta, vetores_consulta, codigos_base, vetores_base, k):
+    """Top-K por produto interno, ignorando o próprio curso na base"""
+    k = min(k, len(codigos_base))
+    vizinhos = np.empty((len(codigos_consulta), k), dtype=np.int64)
+    scores = np.empty((len(codigos_consulta), k), dtype=np.float32)
+
+    # Processa em blocos para limitar a matriz de similaridade em catálogos grandes
+    for inicio in range(0, len(codigos_consulta), TAMANHO_BLOCO):
+        fim = inicio + TAMANHO_BLOCO
+        bloco = vetores_consulta[inicio:fim] @ vetores_base.T
+        bloco[codigos_consulta[inicio:fim, None] == codigos_base[None, :]] = -np.inf
+        vizinhos[inicio:fim], scores[inicio:fim] = selecionar_top_k(bloco, k)
+
+    return vizinhos, scores
+
+
+def _construir_particao(codigos, hashes, vetores, codigos_base, hashes_base, vetores_base, k, anterior):
+    """Calcula (ou atualiza) os vizinhos de todas as consultas em uma partição"""
+    n = len(codigos)
+    vizinhos = np.full((n, k), -1, dtype=np.int64)
+    scores = np.full((n, k), -np.inf, dtype=np.float32)
+
+    recalcular = np.ones(n, dtype=bool)
+    posicao_base = {cod: i for i, cod in enumerate(codigos_base.tolist())}
+
+    if anterior is not None and len(codigos):
+        chave_base_antiga = set(zip(anterior['base'].tolist(), anterior['hashes_base'].tolist()))
+        chave_base_nova = set(zip(codigos_base.tolist(), hashes_base.tolist()))
+
+        # Itens da base que entraram/mudaram e que saíram/mudaram desde a última construção
+        novos_base = np.array([(cod, h) not in chave_base_antiga for cod, h in zip(codigos_base.tolist(), hashes_base.tolist())], dtype=bool)
+        removidos = np.array([chave not in chave_base_nova for chave in zip(anterior['base'].tolist(), anterior['hashes_base'].tolist())], dtype=bool)
+
+        consulta_antiga = {cod: i for i, cod in enumerate(anterior['consultas'].tolist())}
+        for i, (cod, h) in enumerate(zip(codigos.tolist(), hashes.tolist())):
+            j = consulta_antiga.get(cod)
+            if j is None or anterior['hashes_consultas'][j] != h:
+                continue
+
+            linha = anterior['vizinhos'][j]
+            linha = linha[linha >= 0]
+            # Um vizinho removido/alterado pode ter sido substituído por alguém fora do top-K antigo
+            if removidos[linha].any():
+                continue
+
+            vizinhos[i, :len(linha)] = [posicao_base[cod_viz] for cod_viz in anterior['base'][linha].tolist()]
+            scores[i, :len(linha)] = anterior['scores'][j, :len(linha)]
+            recalcular[i] = False
+
+        # Consultas preservadas: basta comparar com os itens novos da base
+        preservadas = np.flatnonzero(~recalcular)
+        indices_novos = np.flatnonzero(novos_base)
+        if len(preservadas) and len(indices_novos):
+            novos_viz, novos_scores = _top_k_excluindo_proprio(
+                codigos[preservadas], vetores[preservadas],
+                codigos_base[indices_novos], vetores_base[indices_novos], k
+            )
+            cand_viz = np.hstack([vizinhos[preservadas], indices_novos[novos_viz]])
+            cand_scores = np.hstack([scores[preservadas], novos_scores])
+            cand_scores[cand_viz < 0] = -np.inf
+
+            pos, sc = selecionar_top_k(cand_scores, k)
+            vizinhos[preservadas] = np.take_along_axis(cand_viz, pos, axis=1)
+            scores[preservadas] = sc
+
+    indices = np.flatnonzero(recalcular)
+    if len(indices) and len(codigos_base):
+        viz, sc = _top_k_excluindo_proprio(codigos[indices], vetores[indices], codigos_base, vetores_base, k)
+        vizinhos[indices, :viz.shape[1]] = viz
+        scores[indices, :sc.shape[1]] = sc
+
+    # Posições vazias (base menor que k ou apenas o próprio curso) ficam com -1
+    vizinhos[~np.isfinite(scores)] = -1
+
+    return {
+        'consultas': codigos,
+        'hashes_consultas': hashes,
+        'base': codigos_base,
+        'hashes_base': hashes_base,
+        'vizinhos': vizinhos,
+        'scores': scores
+    }
@@ -0,0 +1,81 @@
+"""
+Testes dos índices vetoriais
+Recall@10 do backend aproximado (IVF) em relação ao exato e persistência dos índices
+"""
+
+import numpy as np
+
+from indice_vetorial import IndiceExato, IndiceIVF, avaliar_recall, carregar_indice
+
+# Recall@10 mínimo do IVF com os parâmetros padrão (n_sondas=8)
+RECALL_MINIMO = 0.95
+
+
+def vetores_agrupados(n=5000, n_grupos=40, dimensao=32, ruido=0.3, semente=0):
+    """Vetores em torno de centros aleatórios, como embeddings de cursos de áreas próximas"""
+    rng = np.random.default_rng(semente)
+    centros = rng.normal(size=(n_grupos, dimensao))
+    grupos = rng.integers(n_grupos, size=n)
+    return (centros[grupos] + ruido * rng.normal(size=(n, dimensao))).astype(np.float32)
+
+
+def consultas_agrupadas(vetores, n=200, ruido=0.1, semente=1):
+    """Consultas próximas de vetores da base (mesma distribuição dos agrupamentos)"""
+    rng = np.random.default_rng(semente)
+    escolhidos = vetores[rng.choice(len(vetores), n, replace=False)]
+    return (escolhidos + ruido * rng.normal(size=escolhidos.shape)).astype(np.float32)
+
+
+def test_recall_ivf_contra_exato():
+    vetores = vetores_agrupados()
+    consultas = consultas_agrupadas(vetores)
+
+    exato = IndiceExato().construir(vetores)
+    ivf = IndiceIVF().construir(vetores)
+
+    assert avaliar_recall(ivf, exato, consultas, 10) >= RECALL_MINIMO
+
+
+def test_recall_cresce_com_sondas():
+    vetores = vetores_agrupados()
+    consultas = consultas_agrupadas(vetores)
+    exato = IndiceExato().construir(vetores)
+
+    recalls = [
+        avaliar_recall(IndiceIVF(n_sondas=n_sondas).construir(vetores), exato, consultas, 10)
+        for n_sondas in (1, 2, 4, 8)
+    ]
+
+    assert recalls == sorted(recalls)
+    assert recalls[0] < 1.0
+
+
+def test_ivf_com_todas_as_listas_equivale_ao_exato():
+    vetores = vetores_agrupados(n=500)
+    consultas = consultas_agrupadas(vetores, n=50)
+
+    exato = IndiceExato().construir(vetores)
+    ivf = IndiceIVF(n_listas=10, n_sondas=10).construir(vetores)
+
+    assert avaliar_recall(ivf, exato, consultas, 10) == 1.0
+
+
+def test_salvar_e_carregar_preservam_vizinhos(tmp_path):
+    vetores = vetores_agrupados(n=500)
+    consultas = consultas_agrupadas(vetores, n=50)
+
+    for indice in (IndiceExato(), IndiceIVF(n_sondas=4)):
+        indice.construir(vetores, assinatura='catalogo-teste')
+        path = tmp_path / f'indice_{indice.tipo}.npz'
+        indice.salvar(str(path))
+
+        carregado = carregar_indice(str(path))
+
+        assert type(carregado) is type(indice)
+        assert carregado.assinatura == 'catalogo-teste'
+        assert carregado.parametros == indice.parametros
+
+        posicoes, scores = indice.buscar(consultas, 10)
+        posicoes_carregado, scores_carregado = carregado.buscar(consultas, 10)
+        np.testing.assert_array_equal(posicoes_carregado, posicoes)
+        np.testing.assert_array_equal(scores_carregado, scores)
@@ -0,0 +1,79 @@
+"""
+Teste de carga do serviço HTTP (servico_api.py)
+Dispara requisições concorrentes contra uma instância local e reporta vazão e latências.
+
+Exemplo:
+    python teste_carga.py --interesses interesses.csv --requisicoes 2000 --concorrencia 32
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def requisitar(url_base, cod_interesse, timeout):
+    """Executa um GET de recomendações e retorna (latência em s, quantidade, erro)"""
+    t1 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(f'{url_base}/recommendations/{cod_interesse}', timeout=timeout) as resposta:
+            corpo = json.loads(resposta.read())
+        return time.perf_counter() - t1, len(corpo['recomendacoes']), None
+    except Exception as e:
+        return time.perf_counter() - t1, 0, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga do serviço de recomendação')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Endereço do serviço')
+    parser.add_argument('--interesses', required=True, help='Arquivo CSV com coluna COD_INTERESSE')
+    parser.add_argument('--requisicoes', type=int, default=1000, help='Total de requisições')
+    parser.add_argument('--concorrencia', type=int, default=16, help='Requisições simultâneas')
+    parser.add_argument('--timeout', type=float, default=60, help='Timeout por requisição (s)')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do sorteio de interesses')
+    args = parser.parse_args()
+
+    interesses = pd.read_csv(args.interesses)['COD_INTERESSE'].tolist()
+    if not interesses:
+        print("❌ Nenhum interesse no arquivo informado")
+        sys.exit(1)
+
+    rng = random.Random(args.semente)
+    sorteados = [rng.choice(interesses) for _ in range(args.requisicoes)]
+
+    print(f"🚀 {args.requisicoes} requisições, concorrência {args.concorrencia}, alvo {args.url}")
+
+    t1 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        resultados = list(executor.map(lambda cod: requisitar(args.url, cod, args.timeout), sorteados))
+    t_total = time.perf_counter() - t1
+
+    latencias = np.array([lat for lat, _, erro in resultados if erro is None]) * 1000
+    erros = [erro for _, _, erro in resultados if erro is not None]
+    recomendacoes = sum(qtd for _, qtd, _ in resultados)
+
+    print(f"\n📊 RESULTADO DO TESTE DE CARGA")
+    print(f"   Tempo total:        {t_total:10.2f} s")
+    print(f"   Vazão:              {len(resultados) / t_total:10.1f} req/s")
+    print(f"   Sucesso / erros:    {len(latencias):>6} / {len(erros)}")
+    print(f"   Recomendações:      {recomendacoes:>10}")
+
+    if len(latencias):
+        for nome, valor in (('média', latencias.mean()), ('p50', np.percentile(latencias, 50)),
+                            ('p95', np.percentile(latencias, 95)), ('p99', np.percentile(latencias, 99)),
+                            ('máx', latencias.max())):
+            print(f"   Latência {nome:5}      {valor:10.1f} ms")
+
+    if erros:
+        print(f"\n⚠️  Primeiro erro: {erros[0]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()